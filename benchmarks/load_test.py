@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""HTTP load test for the FastAPI endpoints with latency percentiles.
+
+Seeds a throwaway SQLite database with synthetic devices, starts `webserver.py`
+under uvicorn against it, then drives `/devices`, `/devices/{identifier}` and
+`/search` with a weighted query mix at increasing concurrency. Each level
+reports throughput and p50/p95/p99 latency; the full report is written as JSON.
+
+    python benchmarks/load_test.py --hosts 1000 --concurrency 1,8,32,128 --duration 15
+    python benchmarks/load_test.py --url http://localhost:5000   # existing server
+
+With `--url` nothing is seeded: the query mix is drawn from the target's own
+`GET /devices`, so lookups and searches hit devices that exist there.
+
+The client is plain asyncio (one keep-alive HTTP/1.1 connection per virtual
+user), so it needs nothing beyond the standard library.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import parser
+import snapshot
+import storage
+from benchmarks.synthetic import make_hosts, render_router_page
+
+DEFAULT_CONCURRENCY = (1, 4, 16, 64)
+
+
+def seed_database(path, hosts):
+    """Store one poll of the synthetic hosts in a new SQLite database."""
+    storage.DB_BACKEND = 'sqlite'
+    storage.SQLITE_PATH = path
+    devices = parser.parse_router_page(render_router_page(hosts))
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.update_database(devices)
+    return devices
+
+
+def fetch_devices(base):
+    """The devices a running server knows about, to build its query mix from."""
+    with urllib.request.urlopen(base.rstrip('/') + '/devices', timeout=30) as response:
+        devices = json.load(response)
+    if not devices:
+        raise SystemExit(f"{base} has no devices to query; seed it or run without --url")
+    return devices
+
+
+def build_requests(devices, rng, count=2000):
+    """A shuffled list of (label, path) pairs approximating dashboard traffic.
+
+    Identifiers, networks and types are drawn from `devices`; query kinds with
+    nothing to draw from (e.g. no known MACs) are left out of the mix.
+    """
+    named = [d for d in devices if d['hostname'] and d['hostname'] != 'Unknown'
+             and not d['hostname'].startswith('unknown')]
+    addressed = [d for d in devices if d['ip_address'] and d['ip_address'] != 'Unknown']
+    networks = sorted({d['ip_address'].rsplit('.', 1)[0] + '.0/24' for d in addressed if '.' in d['ip_address']})
+    with_mac = [d for d in devices if d['mac_address']]
+    types = sorted({d['device_type'] for d in devices if d['device_type']})
+    kinds = [
+        # (weight, label, path factory, pool it draws from)
+        (10, '/devices', lambda: '/devices', devices),
+        (10, '/devices/{hostname}', lambda: f"/devices/{rng.choice(named)['hostname']}", named),
+        (10, '/devices/{ip}', lambda: f"/devices/{rng.choice(addressed)['ip_address']}", addressed),
+        (5, '/devices/{type}', lambda: f"/devices/{rng.choice(types)}", types),
+        (25, '/search substring', lambda: f"/search?q={rng.choice(named)['hostname'][:4]}", named),
+        (15, '/search wildcard', lambda: f"/search?q=*{rng.choice(named)['hostname'][:3]}*", named),
+        (15, '/search cidr', lambda: f"/search?q={rng.choice(networks)}", networks),
+        (10, '/search mac', lambda: f"/search?q={rng.choice(with_mac)['mac_address'][:8]}", with_mac),
+        (10, '/search filter',
+         lambda: f"/search?q=type:{rng.choice(types)}+host:{rng.choice(named)['hostname'][:3]}*", named and types),
+    ]
+    kinds = [kind for kind in kinds if kind[3]]
+    weights = [kind[0] for kind in kinds]
+    picks = rng.choices(kinds, weights=weights, k=count)
+    return [(label, urllib.parse.quote(make(), safe='/?=*:+')) for _, label, make, _ in picks]
+
+
+async def fetch(reader, writer, host, path):
+    """Send one keep-alive GET and return (status, body length)."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+    if not chunked:
+        await reader.readexactly(length)
+        return status, length
+    total = 0
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        await reader.readexactly(size + 2)
+        total += size
+        if size == 0:
+            return status, total
+
+
+async def virtual_user(base, requests_mix, offset, deadline, results):
+    parts = urllib.parse.urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+    reader = writer = None
+    index = offset
+    while time.perf_counter() < deadline:
+        label, path = requests_mix[index % len(requests_mix)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            status, _ = await fetch(reader, writer, parts.netloc, parts.path.rstrip('/') + path)
+            results.append((label, time.perf_counter() - start, status))
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            results.append((label, time.perf_counter() - start, type(e).__name__))
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+def percentiles(latencies):
+    ordered = sorted(latencies)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+async def run_level(base, requests_mix, concurrency, duration):
+    results = []
+    start = time.perf_counter()
+    deadline = start + duration
+    stride = max(1, len(requests_mix) // concurrency)
+    await asyncio.gather(*(
+        virtual_user(base, requests_mix, user * stride, deadline, results) for user in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    ok = [latency for _, latency, status in results if status == 200]
+    errors = {}
+    for _, _, status in results:
+        if status != 200:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    by_endpoint = {}
+    for label, latency, status in results:
+        if status == 200:
+            by_endpoint.setdefault(label, []).append(latency)
+    return {
+        'concurrency': concurrency,
+        'requests': len(results),
+        'errors': errors,
+        'throughput_rps': len(ok) / elapsed,
+        **(percentiles(ok) if ok else {}),
+        'endpoints': {label: {'requests': len(values), **percentiles(values)}
+                      for label, values in sorted(by_endpoint.items())},
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def local_server(db_path, workers, snapshot_path=None):
+    """Run webserver.py under uvicorn against `db_path` until the block exits."""
+    port = free_port()
+    env = dict(os.environ, DB_BACKEND='sqlite', SQLITE_PATH=db_path, SNAPSHOT_PATH=snapshot_path or '')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'webserver:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        cwd=ROOT, env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base + '/stats', timeout=1).read()
+                break
+            except OSError:
+                if process.poll() is not None:
+                    raise RuntimeError('webserver exited during startup')
+                time.sleep(0.1)
+        else:
+            raise RuntimeError('webserver did not become ready')
+        yield base
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def print_level(level):
+    print(f"c={level['concurrency']:<4} {level['throughput_rps']:9.1f} req/s  "
+          f"p50 {level.get('p50_ms', 0):8.2f} ms  p95 {level.get('p95_ms', 0):8.2f} ms  "
+          f"p99 {level.get('p99_ms', 0):8.2f} ms  errors {sum(level['errors'].values())}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Load-test the device API')
+    arg_parser.add_argument('--url', help='Target an already running server instead of starting one')
+    arg_parser.add_argument('--hosts', type=int, default=1000, help='Devices to seed and draw queries from (ignored with --url)')
+    arg_parser.add_argument('--workers', type=int, default=1, help='uvicorn workers (ignored with --url)')
+    arg_parser.add_argument('--snapshot', action='store_true',
+                            help='Serve reads from the memory-mapped snapshot (ignored with --url)')
+    arg_parser.add_argument('--concurrency', default=','.join(map(str, DEFAULT_CONCURRENCY)),
+                            help='Comma-separated numbers of concurrent users')
+    arg_parser.add_argument('--duration', type=float, default=10, help='Seconds per concurrency level')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Random seed for data and query mix')
+    arg_parser.add_argument('--output', '-o', default='load_results.json', help='JSON report path')
+    args = arg_parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    levels = []
+    with contextlib.ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        if args.url:
+            base = args.url
+            devices = fetch_devices(base)
+        else:
+            db_path = os.path.join(workdir, 'load.db')
+            snapshot_path = os.path.join(workdir, 'devices.snap') if args.snapshot else None
+            if snapshot_path:
+                snapshot.SNAPSHOT_PATH = snapshot_path
+            devices = seed_database(db_path, make_hosts(args.hosts, args.seed))
+            base = stack.enter_context(local_server(db_path, args.workers, snapshot_path))
+        requests_mix = build_requests(devices, rng)
+
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            level = asyncio.run(run_level(base, requests_mix, concurrency, args.duration))
+            print_level(level)
+            levels.append(level)
+
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'config': vars(args),
+        'levels': levels,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote report to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
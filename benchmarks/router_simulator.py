@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Local BGW320 stand-in serving `/cgi-bin/home.ha` for load and soak tests.
+
+Every request advances a churn model over a synthetic device population
+(devices joining and leaving, DHCP address changes, on/off flips; a share of
+hosts report IPv6 link-local addresses) and renders the page in the gateway's
+markup. Faults can be injected per request: slow responses, truncated pages
+and HTTP errors.
+
+    python benchmarks/router_simulator.py --hosts 500 --port 8254 --slow-rate 0.05
+    ROUTER_URL=http://localhost:8254/cgi-bin/home.ha python parser.py
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import ipv4_for, load_template, make_host, render_router_page
+
+ROUTER_PATH = '/cgi-bin/home.ha'
+
+
+class RouterPopulation:
+    """Synthetic device table that changes a little on every poll.
+
+    Rates are per-host probabilities applied on each `step()`, except `join_rate`,
+    which is the expected number of new hosts per step relative to the population.
+    """
+
+    def __init__(self, hosts=200, seed=0, join_rate=0.01, leave_rate=0.01, ip_change_rate=0.02,
+                 flip_rate=0.05):
+        self.rng = random.Random(seed)
+        self.join_rate = join_rate
+        self.leave_rate = leave_rate
+        self.ip_change_rate = ip_change_rate
+        self.flip_rate = flip_rate
+        self.next_index = 0
+        self.hosts = [self._new_host() for _ in range(hosts)]
+        self.lock = threading.Lock()
+
+    def _new_host(self):
+        host = make_host(self.rng, self.next_index)
+        self.next_index += 1
+        return host
+
+    def step(self):
+        """Apply one round of churn and return a copy of the current hosts."""
+        with self.lock:
+            rng = self.rng
+            survivors = [host for host in self.hosts if rng.random() >= self.leave_rate]
+            joins = sum(1 for _ in range(len(self.hosts)) if rng.random() < self.join_rate)
+            survivors.extend(self._new_host() for _ in range(joins))
+            for host in survivors:
+                if host['ip'] and ':' not in host['ip'] and rng.random() < self.ip_change_rate:
+                    # New DHCP lease from a fresh part of the pool
+                    host['ip'] = ipv4_for(rng.randrange(self.next_index * 2 + 250))
+                if rng.random() < self.flip_rate:
+                    host['status'] = 'off' if host['status'] == 'on' else 'on'
+            self.hosts = survivors
+            return [dict(host) for host in survivors]
+
+
+class Faults:
+    """Per-request fault probabilities."""
+
+    def __init__(self, slow_rate=0.0, slow_seconds=5.0, truncate_rate=0.0, error_rate=0.0, seed=0):
+        self.rng = random.Random(seed)
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.truncate_rate = truncate_rate
+        self.error_rate = error_rate
+
+
+def make_handler(population, faults, template):
+    class RouterHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != ROUTER_PATH:
+                self.send_error(404)
+                return
+            rng = faults.rng
+            if rng.random() < faults.error_rate:
+                self.send_error(rng.choice((500, 502, 503)))
+                return
+            if rng.random() < faults.slow_rate:
+                time.sleep(faults.slow_seconds)
+
+            body = render_router_page(population.step(), template).encode('utf-8')
+            if rng.random() < faults.truncate_rate:
+                body = body[:rng.randrange(len(body))]
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return RouterHandler
+
+
+def start_simulator(population, faults=None, host='127.0.0.1', port=0):
+    """Serve in a background thread; returns (server, url). Stop with server.shutdown()."""
+    handler = make_handler(population, faults or Faults(), load_template())
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{ROUTER_PATH}"
+
+
+def add_arguments(arg_parser):
+    """Population and fault options shared with soak.py."""
+    arg_parser.add_argument('--hosts', type=int, default=200, help='Initial device population')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    arg_parser.add_argument('--join-rate', type=float, default=0.01, help='New hosts per poll, relative to population')
+    arg_parser.add_argument('--leave-rate', type=float, default=0.01, help='Chance a host disappears per poll')
+    arg_parser.add_argument('--ip-change-rate', type=float, default=0.02, help='Chance a host gets a new IPv4 lease per poll')
+    arg_parser.add_argument('--flip-rate', type=float, default=0.05, help='Chance a host flips on/off per poll')
+    arg_parser.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of responses delayed')
+    arg_parser.add_argument('--slow-seconds', type=float, default=5.0, help='Delay for slow responses')
+    arg_parser.add_argument('--truncate-rate', type=float, default=0.0, help='Fraction of responses cut short')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of responses that are HTTP 5xx')
+
+
+def from_arguments(args):
+    population = RouterPopulation(args.hosts, args.seed, args.join_rate, args.leave_rate,
+                                  args.ip_change_rate, args.flip_rate)
+    faults = Faults(args.slow_rate, args.slow_seconds, args.truncate_rate, args.error_rate, args.seed)
+    return population, faults
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Serve a simulated BGW320 home.ha page')
+    arg_parser.add_argument('--bind', default='127.0.0.1', help='Address to listen on')
+    arg_parser.add_argument('--port', type=int, default=8254, help='Port to listen on')
+    add_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    population, faults = from_arguments(args)
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(population, faults, load_template()))
+    print(f"Serving simulated router at http://{args.bind}:{args.port}{ROUTER_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
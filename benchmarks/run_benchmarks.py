@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for parsing, upserting and searching at 10, 1k and 10k hosts.
+
+Times `parser.parse_router_page` on synthetic router pages, `parser.update_database`
+against a throwaway SQLite database (first poll = inserts, next poll = updates),
+and `webserver.search_devices` for each query kind. Results are written as JSON
+so runs from different commits can be compared:
+
+    python benchmarks/run_benchmarks.py -o before.json
+    git checkout my-branch
+    python benchmarks/run_benchmarks.py -o after.json --compare before.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import parser
+import snapshot
+import storage
+import webserver
+from benchmarks.synthetic import ipv4_for, load_template, make_hosts, render_router_page
+
+DEFAULT_SIZES = (10, 1000, 10000)
+SEARCH_QUERIES = {
+    'substring': 'phone',
+    'wildcard': '*cam*',
+    'cidr': '192.168.1.0/24',
+    'mac': '00:1a',
+    'ip': ipv4_for(5),
+    'filter_cidr': 'ip:192.168.1.0/24 type:Wi-Fi',
+    'filter_host': 'host:raspberrypi*',
+}
+
+
+def measure(fn, repeat, setup=None):
+    """Run `fn` `repeat` times (after an untimed `setup` each time) and summarize."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'max_s': max(timings),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def use_fresh_database(directory):
+    """Point the storage layer at a new, empty SQLite file."""
+    path = Path(directory) / f"bench-{time.perf_counter_ns()}.db"
+    storage.DB_BACKEND = 'sqlite'
+    storage.SQLITE_PATH = str(path)
+
+
+def quiet(fn):
+    """Wrap `fn` so its progress prints don't skew the timings."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+    return run
+
+
+def run_size(hosts_count, repeat, workdir, template):
+    html = render_router_page(make_hosts(hosts_count), template)
+    devices = parser.parse_router_page(html)
+    results = []
+
+    def record(name, stats, **extra):
+        results.append({'benchmark': name, 'hosts': hosts_count, **extra, **stats})
+        print(f"{name:<28} {hosts_count:>6} hosts {extra.get('kind', ''):<10} "
+              f"median {stats['median_s'] * 1000:9.2f} ms  min {stats['min_s'] * 1000:9.2f} ms")
+
+    record('parse_router_page', measure(lambda: parser.parse_router_page(html), repeat))
+
+    update = quiet(lambda: parser.update_database(devices))
+    record('update_database', measure(update, repeat, setup=lambda: use_fresh_database(workdir)),
+           kind='insert')
+    # The database now holds every host, so further polls are pure updates
+    record('update_database', measure(update, repeat), kind='update')
+
+    for kind, query in SEARCH_QUERIES.items():
+        record('search_devices', measure(lambda: webserver.search_devices(query), repeat), kind=kind)
+    return results
+
+
+def compare(results, baseline_path):
+    """Print the median change of each benchmark against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = {
+            (r['benchmark'], r['hosts'], r.get('kind')): r for r in json.load(f)['results']
+        }
+    print(f"\nChange vs {baseline_path}:")
+    for result in results:
+        key = (result['benchmark'], result['hosts'], result.get('kind'))
+        previous = baseline.get(key)
+        if previous:
+            change = (result['median_s'] / previous['median_s'] - 1) * 100
+            print(f"{key[0]:<28} {key[1]:>6} hosts {key[2] or '':<10} {change:+7.1f}%")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Benchmark parsing, upserting and searching devices')
+    arg_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help='Comma-separated host counts')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+    arg_parser.add_argument('--output', '-o', default='bench_results.json', help='JSON results path')
+    arg_parser.add_argument('--compare', help='Previous results file to compare against')
+    args = arg_parser.parse_args(argv)
+
+    # Always measure the database path, not the memory-mapped snapshot
+    snapshot.SNAPSHOT_PATH = ''
+    template = load_template()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(',')):
+            results.extend(run_size(size, args.repeat, workdir, template))
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Soak test: run the parser's poll loop against the router simulator.
+
+Polls `parser.poll_once` back to back (or every `--interval` seconds) for
+`--duration` seconds and samples poll latency, failures, database growth and
+process memory, writing the series to a JSON report:
+
+    python benchmarks/soak.py --duration 7200 --hosts 1000 --truncate-rate 0.01 -o soak.json
+
+By default the parser writes to a throwaway SQLite file; `--configured-db`
+uses whatever DB_BACKEND / DB_* / SQLITE_PATH the environment selects.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import parser
+import storage
+from benchmarks.router_simulator import add_arguments, from_arguments, start_simulator
+
+
+def rss_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def device_rows():
+    conn = storage.get_db_connection()
+    if not conn:
+        return None
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM devices")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def soak(duration, interval, sample_every):
+    polls = []
+    samples = []
+    errors = {}
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        poll_start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                devices = parser.poll_once()
+            polls.append({'seconds': time.perf_counter() - poll_start, 'devices': len(devices)})
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            polls.append({'seconds': time.perf_counter() - poll_start, 'error': type(e).__name__})
+
+        if (len(polls) - 1) % sample_every == 0:
+            sample = {
+                'elapsed_s': time.monotonic() - start,
+                'polls': len(polls),
+                'rss_bytes': rss_bytes(),
+                'device_rows': device_rows(),
+            }
+            if storage.DB_BACKEND == 'sqlite' and os.path.exists(storage.SQLITE_PATH):
+                sample['db_bytes'] = sum(
+                    os.path.getsize(path) for path in (storage.SQLITE_PATH, storage.SQLITE_PATH + '-wal')
+                    if os.path.exists(path)
+                )
+            samples.append(sample)
+            print(f"{sample['elapsed_s']:8.1f}s  polls {len(polls):6}  rss {sample['rss_bytes'] / 2**20:7.1f} MiB  "
+                  f"rows {sample['device_rows']}  errors {sum(errors.values())}")
+        if interval:
+            time.sleep(interval)
+    return polls, samples, errors, time.monotonic() - start
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Soak-test the parser loop against the router simulator')
+    arg_parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+    arg_parser.add_argument('--interval', type=float, default=0, help='Pause between polls (seconds)')
+    arg_parser.add_argument('--sample-every', type=int, default=10, help='Record resource usage every N polls')
+    arg_parser.add_argument('--configured-db', action='store_true',
+                            help='Use the DB configured in the environment instead of a temporary SQLite file')
+    arg_parser.add_argument('--output', '-o', default='soak_results.json', help='JSON report path')
+    add_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    population, faults = from_arguments(args)
+    server, url = start_simulator(population, faults)
+    parser.ROUTER_URL = url
+    # Don't let one slow response stall the soak for the production read timeout
+    parser.TIMEOUT = (5, max(30.0, args.slow_seconds * 2))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if not args.configured_db:
+            storage.DB_BACKEND = 'sqlite'
+            storage.SQLITE_PATH = os.path.join(workdir, 'soak.db')
+        try:
+            polls, samples, errors, elapsed = soak(args.duration, args.interval, max(1, args.sample_every))
+        finally:
+            server.shutdown()
+
+    ok = [poll['seconds'] for poll in polls if 'error' not in poll]
+    summary = {
+        'polls': len(polls),
+        'failed_polls': len(polls) - len(ok),
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'polls_per_second': len(polls) / elapsed,
+        'poll_p50_s': statistics.median(ok) if ok else None,
+        'poll_p95_s': percentile(ok, 0.95) if ok else None,
+        'poll_max_s': max(ok) if ok else None,
+        'rss_start_bytes': samples[0]['rss_bytes'] if samples else None,
+        'rss_end_bytes': samples[-1]['rss_bytes'] if samples else None,
+        'device_rows_end': samples[-1]['device_rows'] if samples else None,
+    }
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'config': vars(args),
+        'summary': summary,
+        'samples': samples,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(summary, indent=2))
+    print(f"Wrote report to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
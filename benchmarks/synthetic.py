@@ -0,0 +1,84 @@
+"""Synthetic BGW320 `home.ha` pages for benchmarks and the router simulator.
+
+Pages reuse `home.ha.html` verbatim around the "LAN Host Discovery Table" and
+render each host row in the same markup the gateway uses, so they exercise
+`parser.parse_router_page` exactly like the real thing.
+"""
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+TEMPLATE_FILE = ROOT / 'home.ha.html'
+
+TABLE_START = '<table class="table100" summary="LAN Host Discovery Table">'
+NAMES = ('iPhone', 'Galaxy-S23', 'raspberrypi', 'Doorbell', 'Samsung-Refrigerator', 'LivingRoom-TV',
+         'SWNHD-825CAM', 'Chromecast', 'ubuntu', 'MacBook-Pro', 'Watch', 'Ring Solutions', 'Texas Instruments')
+WIFI_BANDS = ('2.4 GHz, Home, Asgard', '5 GHz, Home, Asgard', '2.4 GHz, Guest, Midgard')
+
+
+def load_template():
+    """Split the sample page into (head, tail) around the device rows."""
+    html = TEMPLATE_FILE.read_text(encoding='utf-8', errors='ignore')
+    start = html.index(TABLE_START)
+    header_end = html.index('</tr>', start) + len('</tr>')
+    table_end = html.index('</table>', header_end)
+    return html[:header_end] + '\n', html[table_end:]
+
+
+def ipv4_for(index):
+    """Deterministic, unique LAN address for the index-th host."""
+    return f"192.168.{1 + index // 250}.{2 + index % 250}"
+
+
+def make_host(rng, index):
+    """Return one host: hostname, ip (None, IPv4 or IPv6), status, connection, band, bars."""
+    mac = ''.join(f"{rng.randrange(256):02x}" for _ in range(6))
+    if rng.random() < 0.4:
+        hostname = f"unknown{mac}"
+    else:
+        hostname = f"{rng.choice(NAMES)}-{index}"
+    connection = 'Wi-Fi' if rng.random() < 0.6 else 'Ethernet'
+    if rng.random() < 0.02:
+        ip = f"fe80::{mac[:4]}:{mac[4:8]}:{mac[8:]}:{index:x}"
+    else:
+        ip = ipv4_for(index)
+    return {
+        'hostname': hostname,
+        'ip': ip,
+        'status': 'on' if rng.random() < 0.6 else 'off',
+        'connection': connection,
+        'band': rng.choice(WIFI_BANDS) if connection == 'Wi-Fi' else None,
+        'bars': rng.randint(1, 5),
+    }
+
+
+def make_hosts(count, seed=0):
+    rng = random.Random(seed)
+    return [make_host(rng, index) for index in range(count)]
+
+
+def render_row(host):
+    """Render one <tr> the way the gateway does for on/off, Wi-Fi/Ethernet hosts."""
+    online = host['status'] == 'on'
+    # The gateway only shows an address for hosts that currently hold a lease
+    name = f"{host['ip']} / {host['hostname']}" if online and host['ip'] else host['hostname']
+    if host['connection'] == 'Wi-Fi':
+        if online:
+            bars = host['bars']
+            connection = (f'Wi-Fi&nbsp;&nbsp;&nbsp;<img src="/images/signal-strength-{bars}-bar.png" '
+                          f'alt="Wi-Fi {bars} bars" />')
+        else:
+            connection = 'Wi-Fi'
+        details = host['band']
+    else:
+        connection = 'Ethernet'
+        details = '&nbsp;'
+    if online:
+        details = f'<pre class="column">{details}</pre>'
+    return (f'<tr><td scope="row" class="col2">{name}</td><td class="col2">{host["status"]}</td>'
+            f'<td class="col2">{connection}</td><td class="col2">{details}</td><td class="col2">No</td></tr>')
+
+
+def render_router_page(hosts, template=None):
+    head, tail = template or load_template()
+    return head + '\n'.join(render_row(host) for host in hosts) + '\n' + tail
@@ -1,58 +1,174 @@
+"""Stream device reports as Markdown, CSV, JSON or HTML.
+
+Devices come from a tab-separated router export (`device_list.txt`) or from the
+live database. Rows are normalized by `parser.normalize_device`, read one at a
+time (database rows through an unbuffered, server-side cursor) and written as
+they arrive, so memory use stays constant however long the device history is.
+"""
 import sys
 import argparse
+import csv
+import html
+import json
 import os
+from datetime import datetime
 
-def parse_and_generate(input_path, output_path):
+from parser import normalize_device
+import storage
+
+FORMATS = ('markdown', 'csv', 'json', 'html')
+EXTENSIONS = {'.md': 'markdown', '.csv': 'csv', '.json': 'json', '.html': 'html', '.htm': 'html'}
+HEADERS = {
+    'id': 'ID',
+    'hostname': 'Hostname',
+    'ip_address': 'IP Address',
+    'mac_address': 'MAC Address',
+    'device_type': 'Type',
+    'status': 'Status',
+    'first_seen': 'First Seen',
+    'last_seen': 'Last Seen',
+}
+DEFAULT_COLUMNS = ('hostname', 'ip_address', 'device_type')
+DB_COLUMNS = ('id', 'hostname', 'ip_address', 'mac_address', 'device_type', 'first_seen', 'last_seen')
+# Fields each source can fill: the export has the live status, the database the history
+SOURCE_COLUMNS = {
+    'file': ('hostname', 'ip_address', 'mac_address', 'device_type', 'status'),
+    'db': DB_COLUMNS,
+}
+BATCH_SIZE = 500
+
+
+def iter_file_devices(input_path):
+    """Yield devices from a tab-separated export, one line at a time."""
     with open(input_path, 'r') as f:
-        lines = f.readlines()
-        
-    table_lines = []
-    table_lines.append("| Hostname | IP Address | Type |")
-    table_lines.append("|---|---|---|")
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        parts = line.split('\t')
-        if len(parts) < 3:
-            continue
-            
-        ip_host_part = parts[0]
-        if ' / ' in ip_host_part:
-            ip_part, host_part = ip_host_part.split(' / ', 1)
-        else:
-            ip_part = ip_host_part
-            host_part = "Unknown"
-            
-        ip = ip_part.strip()
-        hostname = host_part.strip()
-        
-        raw_type = parts[2].strip()
-        if 'Wi-Fi' in raw_type:
-            device_type = 'Wi-Fi'
-        elif 'Ethernet' in raw_type:
-            device_type = 'Ethernet'
-        else:
-            device_type = raw_type
-            
-        table_lines.append(f"| {hostname} | {ip} | {device_type} |")
-        
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = line.split('\t')
+            if len(parts) < 3:
+                continue
+
+            yield normalize_device(parts[0].strip(), parts[2].strip(), parts[1].strip())
+
+
+def iter_db_devices(batch_size=BATCH_SIZE):
+    """Yield devices from the configured database without loading them all."""
+    conn = storage.get_db_connection()
+    if not conn:
+        raise SystemExit("Could not connect to the database")
+
+    # mysql-connector cursors are unbuffered by default, so rows stay on the
+    # server until fetched; SQLite cursors step through the table the same way.
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT {', '.join(DB_COLUMNS)} FROM devices ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                for key, value in row.items():
+                    if isinstance(value, datetime):
+                        row[key] = value.isoformat()
+                yield row
+    finally:
+        # Closing an unbuffered mysql-connector cursor with rows still pending
+        # (the reader stopped early or a write failed) raises "Unread result
+        # found" and hides the real error; closing the connection discards them.
+        conn.close()
+
+
+def cell(device, column):
+    value = device.get(column)
+    return '' if value is None else str(value)
+
+
+def write_markdown(devices, out, columns):
+    out.write('| ' + ' | '.join(HEADERS[c] for c in columns) + ' |\n')
+    out.write('|' + '---|' * len(columns) + '\n')
+    for device in devices:
+        out.write('| ' + ' | '.join(cell(device, c).replace('|', '\\|') for c in columns) + ' |\n')
+
+
+def write_csv(devices, out, columns):
+    writer = csv.writer(out)
+    writer.writerow(HEADERS[c] for c in columns)
+    for device in devices:
+        writer.writerow(cell(device, c) for c in columns)
+
+
+def write_json(devices, out, columns):
+    out.write('[')
+    for index, device in enumerate(devices):
+        out.write(',\n' if index else '\n')
+        out.write(json.dumps({c: device.get(c) for c in columns}))
+    out.write('\n]\n')
+
+
+def write_html(devices, out, columns):
+    out.write('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+              '<title>Device Report</title>\n</head>\n<body>\n<table>\n<thead>\n<tr>')
+    out.write(''.join(f'<th>{html.escape(HEADERS[c])}</th>' for c in columns))
+    out.write('</tr>\n</thead>\n<tbody>\n')
+    for device in devices:
+        out.write('<tr>' + ''.join(f'<td>{html.escape(cell(device, c))}</td>' for c in columns) + '</tr>\n')
+    out.write('</tbody>\n</table>\n</body>\n</html>\n')
+
+
+WRITERS = {
+    'markdown': write_markdown,
+    'csv': write_csv,
+    'json': write_json,
+    'html': write_html,
+}
+
+
+def generate(devices, output_path, fmt='markdown', columns=DEFAULT_COLUMNS):
+    """Write `devices` (any iterable) to `output_path` ('-' for stdout) in `fmt`."""
+    if output_path == '-':
+        WRITERS[fmt](devices, sys.stdout, columns)
+        return
+
     # Ensure output dir exists
     out_dir = os.path.dirname(os.path.abspath(output_path))
     if out_dir and not os.path.exists(out_dir):
         os.makedirs(out_dir, exist_ok=True)
 
-    with open(output_path, 'w') as f:
-        f.write('\n'.join(table_lines) + '\n')
+    with open(output_path, 'w', newline='' if fmt == 'csv' else None) as f:
+        WRITERS[fmt](devices, f, columns)
+
+
+def parse_and_generate(input_path, output_path):
+    generate(iter_file_devices(input_path), output_path)
+
 
 def main(argv=None):
-    parser = argparse.ArgumentParser(description='Generate markdown table from device list')
+    parser = argparse.ArgumentParser(description='Generate a device report from a device list or the database')
     parser.add_argument('--input', '-i', default='device_list.txt', help='Input device list path')
-    parser.add_argument('--output', '-o', default='device_table.md', help='Output markdown path')
+    parser.add_argument('--output', '-o', default='device_table.md', help="Output path ('-' for stdout)")
+    parser.add_argument('--source', choices=('file', 'db'), default='file',
+                        help='Read the tab-separated input file or the configured database')
+    parser.add_argument('--format', '-f', choices=FORMATS,
+                        help='Output format (default: from the output extension, else markdown)')
+    parser.add_argument('--columns', '-c',
+                        help=f"Comma-separated columns; file: {', '.join(SOURCE_COLUMNS['file'])}; "
+                             f"db: {', '.join(SOURCE_COLUMNS['db'])} (default: {','.join(DEFAULT_COLUMNS)})")
     args = parser.parse_args(argv)
-    parse_and_generate(args.input, args.output)
+
+    fmt = args.format or EXTENSIONS.get(os.path.splitext(args.output)[1].lower(), 'markdown')
+    columns = tuple(args.columns.split(',')) if args.columns else DEFAULT_COLUMNS
+    unknown = [c for c in columns if c not in HEADERS]
+    if unknown:
+        parser.error(f"unknown column(s): {', '.join(unknown)}")
+    unavailable = [c for c in columns if c not in SOURCE_COLUMNS[args.source]]
+    if unavailable:
+        parser.error(f"column(s) not available from --source {args.source}: {', '.join(unavailable)} "
+                     f"(available: {', '.join(SOURCE_COLUMNS[args.source])})")
+
+    devices = iter_db_devices() if args.source == 'db' else iter_file_devices(args.input)
+    generate(devices, args.output, fmt, columns)
 
 if __name__ == '__main__':
     main()
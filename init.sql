@@ -11,3 +11,27 @@ CREATE TABLE IF NOT EXISTS devices (
     last_seen DATETIME,
     UNIQUE KEY unique_device (hostname, ip_address)
 );
+
+-- Secondary indexes for /search filters; hostname lookups use unique_device
+CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices (ip_address);
+CREATE INDEX IF NOT EXISTS idx_devices_mac ON devices (mac_address);
+CREATE INDEX IF NOT EXISTS idx_devices_type ON devices (device_type);
+CREATE INDEX IF NOT EXISTS idx_devices_last_seen ON devices (last_seen);
+CREATE INDEX IF NOT EXISTS idx_devices_first_seen ON devices (first_seen);
+
+-- Rollups maintained incrementally by parser.update_database and served by /stats
+CREATE TABLE IF NOT EXISTS device_type_stats (
+    device_type VARCHAR(50) PRIMARY KEY,
+    total_devices INT NOT NULL DEFAULT 0,
+    online_devices INT NOT NULL DEFAULT 0,
+    updated_at DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS device_activity_stats (
+    bucket VARCHAR(4) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    device_type VARCHAR(50) NOT NULL,
+    new_devices INT NOT NULL DEFAULT 0,
+    peak_online INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, bucket_start, device_type)
+);
@@ -0,0 +1,134 @@
+const searchInput = document.getElementById('searchInput');
+const resultsContainer = document.getElementById('resultsContainer');
+
+// Search on Enter key
+searchInput.addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        performSearch();
+    }
+});
+
+async function performSearch() {
+    const query = searchInput.value.trim();
+    if (!query) {
+        showAll();
+        return;
+    }
+    
+    showLoading();
+    
+    try {
+        const response = await fetch(`/search?q=${encodeURIComponent(query)}`);
+        if (!response.ok) throw new Error('Search failed');
+        const devices = await response.json();
+        displayResults(devices, query);
+    } catch (error) {
+        showError(error.message);
+    }
+}
+
+async function showAll() {
+    showLoading();
+    
+    try {
+        const response = await fetch('/devices');
+        if (!response.ok) throw new Error('Failed to fetch devices');
+        const devices = await response.json();
+        displayResults(devices, null);
+    } catch (error) {
+        showError(error.message);
+    }
+}
+
+function showLoading() {
+    resultsContainer.innerHTML = `
+        <div class="loading">
+            <div class="spinner"></div>
+            <p>Searching devices...</p>
+        </div>
+    `;
+}
+
+function showError(message) {
+    resultsContainer.innerHTML = `
+        <div class="error-message">
+            <p>⚠️ ${message}</p>
+            <p>Please try again or check your connection.</p>
+        </div>
+    `;
+}
+
+function displayResults(devices, searchQuery) {
+    if (!devices || devices.length === 0) {
+        resultsContainer.innerHTML = `
+            <div class="no-results">
+                <div class="no-results-icon">🔍</div>
+                <p>No devices found${searchQuery ? ' matching "' + escapeHtml(searchQuery) + '"' : ''}</p>
+            </div>
+        `;
+        return;
+    }
+    
+    const headerText = searchQuery 
+        ? `Found <span>${devices.length}</span> device${devices.length !== 1 ? 's' : ''} matching "${escapeHtml(searchQuery)}"`
+        : `Showing <span>${devices.length}</span> device${devices.length !== 1 ? 's' : ''}`;
+    
+    let html = `
+        <div class="results-header">
+            <p class="results-count">${headerText}</p>
+        </div>
+        <div class="results-grid">
+    `;
+    
+    for (const device of devices) {
+        const deviceType = (device.device_type || 'unknown').toLowerCase();
+        const typeClass = deviceType.includes('wi-fi') || deviceType.includes('wifi') ? 'wifi' : 'ethernet';
+        
+        html += `
+            <div class="device-card">
+                <div class="device-header">
+                    <span class="device-name">${escapeHtml(device.hostname || 'Unknown')}</span>
+                    <span class="device-type ${typeClass}">${escapeHtml(device.device_type || 'Unknown')}</span>
+                </div>
+                <div class="device-info">
+                    <div class="info-row">
+                        <span class="info-label">IP Address</span>
+                        <span class="info-value ip">${escapeHtml(device.ip_address || 'N/A')}</span>
+                    </div>
+                    <div class="info-row">
+                        <span class="info-label">MAC Address</span>
+                        <span class="info-value mac">${escapeHtml(device.mac_address || 'N/A')}</span>
+                    </div>
+                    <div class="info-row">
+                        <span class="info-label">First Seen</span>
+                        <span class="info-value">${formatDateTime(device.first_seen)}</span>
+                    </div>
+                    <div class="info-row">
+                        <span class="info-label">Last Seen</span>
+                        <span class="info-value">${formatDateTime(device.last_seen)}</span>
+                    </div>
+                </div>
+            </div>
+        `;
+    }
+    
+    html += '</div>';
+    resultsContainer.innerHTML = html;
+}
+
+function escapeHtml(text) {
+    if (!text) return '';
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+function formatDateTime(dateStr) {
+    if (!dateStr) return 'N/A';
+    try {
+        const date = new Date(dateStr);
+        return date.toLocaleString();
+    } catch {
+        return dateStr;
+    }
+}
@@ -0,0 +1,59 @@
+"""Prometheus metrics for the parser and webserver hot paths.
+
+The webserver exposes these on `/metrics`; the parser serves them on
+`PARSER_METRICS_PORT` (0, the default, disables it; avoid 9100, which
+node_exporter usually holds). When the webserver runs with several
+uvicorn workers, set `PROMETHEUS_MULTIPROC_DIR` to a shared, empty directory
+so `/metrics` aggregates all workers.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+PARSER_METRICS_PORT = int(os.getenv('PARSER_METRICS_PORT', '0'))
+
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Parser
+POLL_STAGE_SECONDS = Histogram(
+    'bgw320_poll_stage_seconds', 'Time spent in each stage of a parser poll (fetch, parse, db, snapshot)',
+    ['stage'],
+)
+POLL_ROWS = Counter(
+    'bgw320_poll_rows_total', 'Device rows handled by the parser (parsed, inserted, updated)',
+    ['action'],
+)
+POLL_ERRORS = Counter('bgw320_poll_errors_total', 'Parser polls that failed with an exception')
+
+# Shared
+DB_CONNECT_SECONDS = Histogram(
+    'bgw320_db_connect_seconds', 'Time to acquire a database connection',
+    ['backend'],
+)
+
+# Webserver
+REQUEST_SECONDS = Histogram(
+    'bgw320_http_request_seconds', 'HTTP request latency by route',
+    ['method', 'endpoint', 'status'],
+)
+RESULT_ROWS = Histogram(
+    'bgw320_http_result_rows', 'Number of devices returned per request',
+    ['endpoint'], buckets=ROW_BUCKETS,
+)
+
+
+def render_latest():
+    """Return (body, content_type) for a scrape of this process or all workers."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -5,28 +5,86 @@ import datetime
 import re
 import sys
 import os
+import signal
+from collections import Counter
+
+import metrics
+import profiling
+import snapshot
+import storage
 
 # Configuration (overridable via environment variables)
+# Database settings live in storage.py (DB_BACKEND, DB_* and SQLITE_PATH).
 ROUTER_URL = os.getenv('ROUTER_URL', "http://192.168.1.254/cgi-bin/home.ha")
-DB_CONFIG = {
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'host': os.getenv('DB_HOST', 'db'),
-    'database': os.getenv('DB_NAME', 'device_tracker'),
-    'raise_on_warnings': True
-}
 POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '100'))  # seconds
 TIMEOUT = (30, 120) # connect, read
+DB_READY_TIMEOUT = float(os.getenv('DB_READY_TIMEOUT', '120'))  # seconds, 0 = wait forever
+
+# Set by SIGTERM/SIGINT: finish the current poll, then exit. A plain flag, not a
+# threading.Event: a signal handler must not take a lock the main thread it
+# interrupted may already hold.
+_stop_requested = False
+STOP_CHECK_SECONDS = 0.1
 
 def get_db_connection():
-    try:
-        # Import here so a lightweight import of this module (for testing parse logic)
-        # doesn't require mysql connector to be installed.
-        import mysql.connector
-        return mysql.connector.connect(**DB_CONFIG)
-    except mysql.connector.Error as err:
-        print(f"Database connection error: {err}")
-        return None
+    return storage.get_db_connection()
+
+def normalize_device(raw_name, conn_type, status=None):
+    """Turn the router's name and connection cells into a device record.
+
+    Shared by parse_router_page and generate_table.py so both sources agree.
+    """
+    # raw_name is column 0: Device IP Address / Name
+    # Format can be: "IP / Hostname" or just "Hostname" (if IP is missing? or just Hostname)
+    # Based on file view:
+    # "192.168.1.124 / SWNHD..."
+    # "unknown00037f12a6a6"
+    # "fe80::... / unknown..."
+    
+    ip_address = None
+    hostname = None
+    mac_address = None
+    
+    if ' / ' in raw_name:
+        parts = raw_name.split(' / ', 1)
+        ip_address = parts[0].strip()
+        hostname = parts[1].strip()
+    else:
+        # It might be just a hostname or just an IP?
+        # "unknown00037f12a6a6" -> Hostname
+        # "NVIDIA" -> Hostname
+        # If it looks like an IP, treat as IP?
+        # Regex for IP?
+        if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', raw_name):
+            ip_address = raw_name
+            hostname = "Unknown"
+        else:
+            hostname = raw_name
+            ip_address = None # Or maybe we can't find it
+    
+    # Try to extract MAC from hostname if it follows "unknown<MAC>" pattern
+    # Pattern: unknown followed by 12 hex chars
+    mac_match = re.search(r'unknown([0-9a-fA-F]{12})', hostname)
+    if mac_match:
+        mac_address = mac_match.group(1)
+        # Format as XX:XX:XX:XX:XX:XX
+        mac_address = ':'.join(mac_address[i:i+2] for i in range(0, 12, 2))
+    
+    # Normalize Type
+    if 'Wi-Fi' in conn_type:
+        device_type = 'Wi-Fi'
+    elif 'Ethernet' in conn_type:
+        device_type = 'Ethernet'
+    else:
+        device_type = conn_type
+
+    return {
+        'mac_address': mac_address,
+        'hostname': hostname,
+        'ip_address': ip_address,
+        'device_type': device_type,
+        'status': status
+    }
 
 def parse_router_page(html_content):
     devices = []
@@ -43,65 +101,81 @@ def parse_router_page(html_content):
     
     for row in rows:
         cols = row.find_all('td')
-        if not cols:
+        # Header rows have no cells; a truncated page can end mid-row
+        if len(cols) < 3:
             continue
             
-        # Column 0: Device IP Address / Name
-        # Format can be: "IP / Hostname" or just "Hostname" (if IP is missing? or just Hostname)
-        # Based on file view:
-        # "192.168.1.124 / SWNHD..."
-        # "unknown00037f12a6a6"
-        # "fe80::... / unknown..."
-        
         raw_name = cols[0].get_text(strip=True)
         status = cols[1].get_text(strip=True) # on/off
         conn_type = cols[2].get_text(strip=True) # Ethernet/Wi-Fi
+
+        devices.append(normalize_device(raw_name, conn_type, status))
         
-        ip_address = None
-        hostname = None
-        mac_address = None
-        
-        if ' / ' in raw_name:
-            parts = raw_name.split(' / ', 1)
-            ip_address = parts[0].strip()
-            hostname = parts[1].strip()
+    return devices
+
+def stat_buckets(ts):
+    """Return the (bucket, bucket_start) pairs a timestamp rolls up into."""
+    return (
+        ('hour', ts.replace(minute=0, second=0, microsecond=0)),
+        ('day', ts.replace(hour=0, minute=0, second=0, microsecond=0)),
+    )
+
+def update_stats(cursor, now, new_by_type, total_delta, online_by_type):
+    """Fold one poll's deltas into the rollup tables read by /stats.
+
+    Only a handful of rows are touched per poll (one per device type and
+    bucket), so the cost is independent of how many devices are tracked.
+    """
+    # Online counts are a snapshot of the latest poll, not a running total.
+    cursor.execute("UPDATE device_type_stats SET online_devices = 0, updated_at = %s", (now,))
+    for dtype in set(total_delta) | set(online_by_type):
+        cursor.execute("SELECT total_devices FROM device_type_stats WHERE device_type = %s", (dtype,))
+        result = cursor.fetchone()
+        if result:
+            cursor.execute("""
+                UPDATE device_type_stats
+                SET total_devices = total_devices + %s, online_devices = %s, updated_at = %s
+                WHERE device_type = %s
+            """, (total_delta[dtype], online_by_type[dtype], now, dtype))
         else:
-            # It might be just a hostname or just an IP?
-            # "unknown00037f12a6a6" -> Hostname
-            # "NVIDIA" -> Hostname
-            # If it looks like an IP, treat as IP?
-            # Regex for IP?
-            if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', raw_name):
-                ip_address = raw_name
-                hostname = "Unknown"
+            cursor.execute("""
+                INSERT INTO device_type_stats (device_type, total_devices, online_devices, updated_at)
+                VALUES (%s, %s, %s, %s)
+            """, (dtype, total_delta[dtype], online_by_type[dtype], now))
+
+    for bucket, bucket_start in stat_buckets(now):
+        for dtype in set(new_by_type) | set(online_by_type):
+            cursor.execute("""
+                SELECT peak_online FROM device_activity_stats
+                WHERE bucket = %s AND bucket_start = %s AND device_type = %s
+            """, (bucket, bucket_start, dtype))
+            result = cursor.fetchone()
+            if result:
+                cursor.execute("""
+                    UPDATE device_activity_stats
+                    SET new_devices = new_devices + %s, peak_online = %s
+                    WHERE bucket = %s AND bucket_start = %s AND device_type = %s
+                """, (new_by_type[dtype], max(result[0], online_by_type[dtype]), bucket, bucket_start, dtype))
             else:
-                hostname = raw_name
-                ip_address = None # Or maybe we can't find it
-        
-        # Try to extract MAC from hostname if it follows "unknown<MAC>" pattern
-        # Pattern: unknown followed by 12 hex chars
-        mac_match = re.search(r'unknown([0-9a-fA-F]{12})', hostname)
-        if mac_match:
-            mac_address = mac_match.group(1)
-            # Format as XX:XX:XX:XX:XX:XX
-            mac_address = ':'.join(mac_address[i:i+2] for i in range(0, 12, 2))
-        
-        # Normalize Type
-        if 'Wi-Fi' in conn_type:
-            device_type = 'Wi-Fi'
-        elif 'Ethernet' in conn_type:
-            device_type = 'Ethernet'
-        else:
-            device_type = conn_type
-
-        devices.append({
-            'mac_address': mac_address,
-            'hostname': hostname,
-            'ip_address': ip_address,
-            'device_type': device_type
-        })
-        
-    return devices
+                cursor.execute("""
+                    INSERT INTO device_activity_stats (bucket, bucket_start, device_type, new_devices, peak_online)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (bucket, bucket_start, dtype, new_by_type[dtype], online_by_type[dtype]))
+
+def publish_snapshot(cursor):
+    """Write the devices table to snapshot.SNAPSHOT_PATH for the webserver to map."""
+    cursor.execute(
+        "SELECT id, mac_address, hostname, ip_address, device_type, first_seen, last_seen FROM devices ORDER BY id"
+    )
+    devices = []
+    for row in cursor.fetchall():
+        device = dict(zip(('id',) + snapshot.STRING_FIELDS, row))
+        # Match the ISO strings the API returns for DATETIME columns
+        for key in ('first_seen', 'last_seen'):
+            if isinstance(device[key], datetime.datetime):
+                device[key] = device[key].isoformat()
+        devices.append(device)
+    snapshot.write_snapshot(snapshot.SNAPSHOT_PATH, devices)
 
 def update_database(devices):
     conn = get_db_connection()
@@ -111,62 +185,181 @@ def update_database(devices):
     cursor = conn.cursor()
     now = datetime.datetime.now()
 
-    for device in devices:
-        # We use (hostname, ip_address) as unique key based on init.sql
-        # But we should handle NULLs. DB might not allow NULL in unique key if not careful, 
-        # but in MySQL NULL != NULL.
-        # However, our table schema has hostname and ip_address as VARCHAR.
-        # If ip_address is None, we should probably store 'Unknown' or similar to ensure uniqueness works if we want it to.
-        # Or better, use a query to check existence.
+    # Per-type deltas for the rollup tables, flushed once at the end of the poll
+    new_by_type = Counter()
+    total_delta = Counter()
+    online = {}
+
+    # One transaction per poll: a failure or an interrupt (second SIGTERM/SIGINT)
+    # mid-batch rolls back instead of leaving a half-written poll behind.
+    try:
+        for device in devices:
+            # We use (hostname, ip_address) as unique key based on init.sql
+            # But we should handle NULLs. DB might not allow NULL in unique key if not careful, 
+            # but in MySQL NULL != NULL.
+            # However, our table schema has hostname and ip_address as VARCHAR.
+            # If ip_address is None, we should probably store 'Unknown' or similar to ensure uniqueness works if we want it to.
+            # Or better, use a query to check existence.
         
-        hostname = device['hostname'] or 'Unknown'
-        ip = device['ip_address'] or 'Unknown'
-        mac = device['mac_address']
-        dtype = device['device_type']
+            hostname = device['hostname'] or 'Unknown'
+            ip = device['ip_address'] or 'Unknown'
+            mac = device['mac_address']
+            dtype = device['device_type']
+            stat_type = dtype or 'Unknown'
+
+            if device.get('status') == 'on':
+                online[(hostname, ip)] = stat_type
         
-        # Check if device exists
-        query = "SELECT id FROM devices WHERE hostname = %s AND ip_address = %s"
-        cursor.execute(query, (hostname, ip))
-        result = cursor.fetchone()
+            # Check if device exists
+            query = "SELECT id, device_type FROM devices WHERE hostname = %s AND ip_address = %s"
+            cursor.execute(query, (hostname, ip))
+            result = cursor.fetchone()
         
-        if result:
-            # Update
-            update_query = """
-                UPDATE devices 
-                SET last_seen = %s, mac_address = COALESCE(%s, mac_address), device_type = %s
-                WHERE id = %s
-            """
-            cursor.execute(update_query, (now, mac, dtype, result[0]))
-        else:
-            # Insert
-            insert_query = """
-                INSERT INTO devices (hostname, ip_address, mac_address, device_type, first_seen, last_seen)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(insert_query, (hostname, ip, mac, dtype, now, now))
+            if result:
+                # Update
+                update_query = """
+                    UPDATE devices 
+                    SET last_seen = %s, mac_address = COALESCE(%s, mac_address), device_type = %s
+                    WHERE id = %s
+                """
+                cursor.execute(update_query, (now, mac, dtype, result[0]))
+                previous_type = result[1] or 'Unknown'
+                if previous_type != stat_type:
+                    total_delta[previous_type] -= 1
+                    total_delta[stat_type] += 1
+            else:
+                # Insert
+                insert_query = """
+                    INSERT INTO devices (hostname, ip_address, mac_address, device_type, first_seen, last_seen)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                cursor.execute(insert_query, (hostname, ip, mac, dtype, now, now))
+                new_by_type[stat_type] += 1
+                total_delta[stat_type] += 1
+
+        # The /stats rollups are derived data: if they fail, keep the device upserts
+        cursor.execute("SAVEPOINT rollups")
+        try:
+            update_stats(cursor, now, new_by_type, total_delta, Counter(online.values()))
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT rollups")
+            print(f"Stats error: {e}")
             
-    conn.commit()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        raise
+
+    inserted = sum(new_by_type.values())
+    metrics.POLL_ROWS.labels('inserted').inc(inserted)
+    metrics.POLL_ROWS.labels('updated').inc(len(devices) - inserted)
+
+    if snapshot.SNAPSHOT_PATH:
+        try:
+            with metrics.POLL_STAGE_SECONDS.labels('snapshot').time():
+                publish_snapshot(cursor)
+        except Exception as e:
+            print(f"Snapshot error: {e}")
+            # Don't leave the previous poll's snapshot to be served as current
+            try:
+                os.remove(snapshot.SNAPSHOT_PATH)
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                print(f"Could not remove stale snapshot: {err}")
+
     cursor.close()
     conn.close()
     print(f"Updated {len(devices)} devices at {now}")
 
+def poll_once():
+    """Fetch the router page, parse it and store the devices; returns the devices."""
+    print("Fetching router page...")
+    with metrics.POLL_STAGE_SECONDS.labels('fetch').time():
+        response = requests.get(ROUTER_URL, timeout=TIMEOUT)
+        response.raise_for_status()
+
+    with metrics.POLL_STAGE_SECONDS.labels('parse').time():
+        devices = parse_router_page(response.text)
+    metrics.POLL_ROWS.labels('parsed').inc(len(devices))
+
+    with metrics.POLL_STAGE_SECONDS.labels('db').time():
+        update_database(devices)
+    return devices
+
+def wait_for_db(timeout=DB_READY_TIMEOUT, initial_delay=0.1, max_delay=5.0):
+    """Probe the database with exponential backoff until it accepts connections.
+
+    Returns True once connected, False on timeout or shutdown request.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    delay = initial_delay
+    while not _stop_requested:
+        conn = get_db_connection()
+        if conn:
+            conn.close()
+            return True
+        if deadline is not None and time.monotonic() + delay > deadline:
+            return False
+        print(f"Database not ready, retrying in {delay:.1f}s")
+        sleep_unless_stopped(delay)
+        delay = min(delay * 2, max_delay)
+    return False
+
+def start_metrics_server():
+    """Serve metrics on PARSER_METRICS_PORT; if the port is taken, poll without them."""
+    if not metrics.PARSER_METRICS_PORT:
+        return False
+    try:
+        metrics.start_http_server(metrics.PARSER_METRICS_PORT)
+    except OSError as e:
+        print(f"Metrics server disabled, cannot bind port {metrics.PARSER_METRICS_PORT}: {e}")
+        return False
+    return True
+
+def sleep_unless_stopped(seconds):
+    """Sleep for `seconds`, returning within STOP_CHECK_SECONDS of a stop request."""
+    deadline = time.monotonic() + seconds
+    while not _stop_requested:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, STOP_CHECK_SECONDS))
+
+def handle_stop_signal(signum, frame):
+    global _stop_requested
+    if _stop_requested:
+        # Second signal: abort now; update_database rolls back the open batch
+        raise KeyboardInterrupt
+    # No print here either: stdout's buffer lock may be held by the interrupted code
+    _stop_requested = True
+
 def main():
-    # Wait for DB to be ready
-    time.sleep(10) 
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+    signal.signal(signal.SIGINT, handle_stop_signal)
+
+    start_metrics_server()
+
+    if not wait_for_db():
+        if _stop_requested:
+            return
+        print(f"Database not ready after {DB_READY_TIMEOUT:.0f}s, giving up")
+        sys.exit(1)
     
-    while True:
-        try:
-            print("Fetching router page...")
-            response = requests.get(ROUTER_URL, timeout=TIMEOUT)
-            response.raise_for_status()
-            
-            devices = parse_router_page(response.text)
-            update_database(devices)
+    # Poll immediately, then every POLL_INTERVAL until asked to stop
+    while not _stop_requested:
+        with profiling.profiled("poll"):
+            try:
+                poll_once()
+            except Exception as e:
+                metrics.POLL_ERRORS.inc()
+                print(f"Error: {e}")
             
-        except Exception as e:
-            print(f"Error: {e}")
-            
-        time.sleep(POLL_INTERVAL)
+        sleep_unless_stopped(POLL_INTERVAL)
+
+    print("Stop requested, parser stopped")
 
 if __name__ == "__main__":
     main()
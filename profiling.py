@@ -0,0 +1,84 @@
+"""Opt-in sampling profiler for API requests and parser poll cycles.
+
+Set `PROFILE_DIR` and `PROFILE_SAMPLE_RATE` (fraction of requests/polls, 0-1)
+to profile a random sample of them under cProfile. Each sample is written as
+`<label>-<timestamp>-<pid>.prof` (pstats format, viewable with `snakeviz`,
+`python -m pstats`, or converted to a flamegraph with `flameprof`). The oldest
+files are removed once the directory exceeds `PROFILE_MAX_MB`.
+
+When disabled, `profiled()` returns a shared no-op context manager.
+
+The webserver samples whole requests around `await call_next(...)`, and
+cProfile records everything on the event-loop thread while it is enabled. A
+request profile therefore also contains work from any other requests that ran
+concurrently on that loop; it is filed under the sampled request's label.
+Profile at low concurrency (or one worker with a single client) when the
+breakdown for one route matters.
+"""
+import contextlib
+import cProfile
+import datetime
+import os
+import random
+import re
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_MAX_MB = float(os.getenv('PROFILE_MAX_MB', '100'))
+
+_NOT_SAMPLED = contextlib.nullcontext()
+# cProfile can't nest, so concurrent requests while one is sampled are skipped
+_active = False
+
+
+def profiled(label):
+    """Context manager that profiles the block for a sampled fraction of calls."""
+    if not PROFILE_DIR or PROFILE_SAMPLE_RATE <= 0 or _active or random.random() >= PROFILE_SAMPLE_RATE:
+        return _NOT_SAMPLED
+    return _profile(label)
+
+
+@contextlib.contextmanager
+def _profile(label):
+    global _active
+    _active = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active = False
+        try:
+            _save(profiler, label)
+        except OSError as err:
+            print(f"Profile write error: {err}")
+
+
+def _save(profiler, label):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_') or 'profile'
+    timestamp = datetime.datetime.now().strftime('%Y%m%dT%H%M%S.%f')
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{safe_label}-{timestamp}-{os.getpid()}.prof"))
+    _enforce_cap()
+
+
+def _enforce_cap():
+    """Delete the oldest profiles until the directory fits in PROFILE_MAX_MB."""
+    files = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file() and entry.name.endswith('.prof'):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    limit = PROFILE_MAX_MB * 1024 * 1024
+    for _, size, path in files:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another worker already removed it
+            pass
+        total -= size
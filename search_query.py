@@ -0,0 +1,384 @@
+"""Filter grammar for `/search`, compiled to an index-aware plan.
+
+A query is a list of whitespace-separated terms, all of which must match:
+
+    type:Wi-Fi host:pi* ip:192.168.1.0/24 seen>2026-10-01 mac:00:03:7f*
+
+`field:value` matches exactly (case-insensitive), or as a wildcard pattern when
+the value contains `*` or `?`; `ip:` also takes CIDR networks. `seen` and
+`first` (last_seen / first_seen) take `:`, `>`, `>=`, `<` and `<=` with an ISO
+date or timestamp, which covers the whole day, hour, minute or second it
+names. Values may be quoted (`host:"living room tv"`). Any other word is matched against every field the
+way the free-text search does. Queries without a `field:` term are not parsed
+here at all; `/search` keeps its original free-text behaviour for them.
+
+`Plan` orders the predicates by how selective their index lookup is. The
+first indexable one becomes the SQL WHERE clause, so the database returns a
+small candidate set instead of the whole table, and every predicate (that one
+included) is then checked in Python, most selective first. Against the
+memory-mapped snapshot, an exact lookup is served from the snapshot's own
+per-field index; other indexed plans go to the database, and only plans
+with no index at all decode the whole snapshot.
+"""
+import fnmatch
+import ipaddress
+import re
+from datetime import datetime, timedelta
+
+FIELDS = {
+    'host': 'hostname',
+    'hostname': 'hostname',
+    'ip': 'ip_address',
+    'mac': 'mac_address',
+    'type': 'device_type',
+    'seen': 'last_seen',
+    'first': 'first_seen',
+}
+TIME_COLUMNS = ('last_seen', 'first_seen')
+TERM = re.compile(r'(?:([A-Za-z_]+)(>=|<=|>|<|:))?("[^"]*"|\S*)')
+
+# Lower ranks are looked up first; None means no index can help
+RANK_UNIQUE = 0      # exact ip / mac
+RANK_EXACT = 1       # exact hostname
+RANK_PREFIX = 2      # LIKE 'prefix%' on hostname / ip / mac, IPv4 CIDR
+RANK_RANGE = 3       # last_seen / first_seen range
+RANK_TYPE = 4        # device_type: only a handful of distinct values
+UNIQUE_COLUMNS = ('ip_address', 'mac_address')
+
+# '!' rather than backslash: the ESCAPE literal parses the same in MariaDB and SQLite
+LIKE_ESCAPE = '!'
+
+
+def is_cidr_notation(query: str) -> bool:
+    """Check if query is in CIDR notation (e.g., 192.168.1.0/24)"""
+    try:
+        ipaddress.ip_network(query, strict=False)
+        return '/' in query
+    except ValueError:
+        return False
+
+
+def ip_in_network(ip: str, network_str: str) -> bool:
+    """Check if an IP address is within a network"""
+    try:
+        network = ipaddress.ip_network(network_str, strict=False)
+        ip_obj = ipaddress.ip_address(ip)
+        return ip_obj in network
+    except ValueError:
+        return False
+
+
+def matches_wildcard(value: str, pattern: str) -> bool:
+    """Check if value matches a wildcard pattern using fnmatch"""
+    if not value:
+        return False
+    return fnmatch.fnmatch(value.lower(), pattern.lower())
+
+
+def matches_text(device: dict, query: str) -> bool:
+    """The free-text match: hostname, IP, MAC, timestamps or type contain `query`."""
+    if is_cidr_notation(query):
+        return bool(device.get('ip_address')) and ip_in_network(device['ip_address'], query)
+
+    has_wildcards = '*' in query or '?' in query
+
+    def contains(value, case_sensitive=False):
+        if has_wildcards:
+            return matches_wildcard(value, query)
+        if case_sensitive:
+            return query in value
+        return query.lower() in value.lower()
+
+    if contains(device.get('hostname', '') or ''):
+        return True
+    if contains(device.get('ip_address', '') or '', case_sensitive=True):
+        return True
+
+    # Normalize MAC address comparison (remove colons/dashes for comparison)
+    mac_address = device.get('mac_address', '') or ''
+    query_normalized = strip_mac(query)
+    mac_normalized = strip_mac(mac_address)
+    if has_wildcards:
+        if matches_wildcard(mac_address, query) or matches_wildcard(mac_normalized, query_normalized):
+            return True
+    elif query_normalized in mac_normalized or query.lower() in mac_address.lower():
+        return True
+
+    for key in ('last_seen', 'first_seen'):
+        if device.get(key) and contains(str(device[key]), case_sensitive=True):
+            return True
+
+    return contains(device.get('device_type', '') or '')
+
+
+def strip_mac(value: str) -> str:
+    return value.replace(':', '').replace('-', '').lower()
+
+
+def like_prefix(prefix: str) -> str:
+    """A LIKE pattern matching values that start with `prefix` literally."""
+    for char in (LIKE_ESCAPE, '%', '_'):
+        prefix = prefix.replace(char, LIKE_ESCAPE + char)
+    return prefix + '%'
+
+
+def literal_prefix(pattern: str) -> str:
+    """The part of a wildcard pattern before its first wildcard."""
+    return re.split(r'[*?\[]', pattern, maxsplit=1)[0]
+
+
+class Predicate:
+    """One term of a query: `matches(device)`, plus `sql()` when `rank` is not None."""
+    rank = None
+    # (column, value) when the term is a case-insensitive equality lookup
+    exact = None
+
+    def matches(self, device):
+        raise NotImplementedError
+
+    def sql(self):
+        """(where clause, params) selecting a superset of the matching rows."""
+        raise NotImplementedError
+
+
+class Equals(Predicate):
+    def __init__(self, column, value):
+        self.column = column
+        self.value = value
+        self.exact = (column, value)
+        if column in UNIQUE_COLUMNS:
+            self.rank = RANK_UNIQUE
+        elif column == 'device_type':
+            self.rank = RANK_TYPE
+        else:
+            self.rank = RANK_EXACT
+
+    def matches(self, device):
+        return (device.get(self.column) or '').lower() == self.value.lower()
+
+    def sql(self):
+        return f"{self.column} = %s", (self.value,)
+
+    def __repr__(self):
+        return f"{self.column} = {self.value!r}"
+
+
+class Pattern(Predicate):
+    def __init__(self, column, pattern):
+        self.column = column
+        self.pattern = pattern
+        self.prefix = literal_prefix(pattern)
+        if self.prefix:
+            self.rank = RANK_TYPE if column == 'device_type' else RANK_PREFIX
+
+    def matches(self, device):
+        return matches_wildcard(device.get(self.column) or '', self.pattern)
+
+    def sql(self):
+        return f"{self.column} LIKE %s ESCAPE '{LIKE_ESCAPE}'", (like_prefix(self.prefix),)
+
+    def __repr__(self):
+        return f"{self.column} LIKE {self.pattern!r}"
+
+
+class MacPattern(Pattern):
+    """MAC patterns match with or without separators (`00037f*` or `00-03-7f*`)."""
+
+    def __init__(self, pattern):
+        stripped = strip_mac(pattern)
+        prefix = literal_prefix(stripped)
+        # Stored as aa:bb:cc:dd:ee:ff, so rebuild the separators for the index lookup
+        if re.fullmatch(r'[0-9a-f]*', prefix):
+            canonical = ':'.join(prefix[i:i + 2] for i in range(0, len(prefix), 2))
+            pattern = canonical + stripped[len(prefix):]
+        super().__init__('mac_address', pattern)
+        self.stripped = stripped
+        if not re.fullmatch(r'[0-9a-f]*', prefix):
+            self.rank = None
+        elif prefix == stripped and len(prefix) == 12:
+            self.rank = RANK_UNIQUE
+            self.exact = ('mac_address', self.pattern)
+
+    def sql(self):
+        if self.rank == RANK_UNIQUE:
+            return "mac_address = %s", (self.pattern,)
+        return super().sql()
+
+    def matches(self, device):
+        return matches_wildcard(strip_mac(device.get('mac_address') or ''), self.stripped)
+
+
+class Network(Predicate):
+    def __init__(self, value):
+        try:
+            self.network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            raise ValueError(f"invalid network {value!r}") from None
+        # Whole octets of an IPv4 network become a string prefix the ip index can seek on
+        octets = self.network.prefixlen // 8 if self.network.version == 4 else 0
+        self.prefix = '.'.join(str(self.network.network_address).split('.')[:octets])
+        if octets == 4:
+            self.rank = RANK_UNIQUE
+        elif octets:
+            self.prefix += '.'
+            self.rank = RANK_PREFIX
+
+    def matches(self, device):
+        ip = device.get('ip_address')
+        if not ip:
+            return False
+        try:
+            return ipaddress.ip_address(ip) in self.network
+        except ValueError:
+            return False
+
+    def sql(self):
+        if self.network.prefixlen == 32:
+            return "ip_address = %s", (self.prefix,)
+        return f"ip_address LIKE %s ESCAPE '{LIKE_ESCAPE}'", (like_prefix(self.prefix),)
+
+    def __repr__(self):
+        return f"ip_address IN {self.network}"
+
+
+class TimeRange(Predicate):
+    """start <= column < end, either bound optional."""
+    rank = RANK_RANGE
+
+    def __init__(self, column, start=None, end=None):
+        self.column = column
+        self.start = start
+        self.end = end
+
+    def matches(self, device):
+        value = device.get(self.column)
+        if not value:
+            return False
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        return (self.start is None or value >= self.start) and (self.end is None or value < self.end)
+
+    def sql(self):
+        clauses, params = [], []
+        if self.start is not None:
+            clauses.append(f"{self.column} >= %s")
+            params.append(self.start)
+        if self.end is not None:
+            clauses.append(f"{self.column} < %s")
+            params.append(self.end)
+        return ' AND '.join(clauses), tuple(params)
+
+    def __repr__(self):
+        return f"{self.start} <= {self.column} < {self.end}"
+
+
+class FreeText(Predicate):
+    def __init__(self, text):
+        self.text = text
+
+    def matches(self, device):
+        return matches_text(device, self.text)
+
+    def __repr__(self):
+        return f"text {self.text!r}"
+
+
+TIMESTAMP = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2})(?::(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?)?)?')
+
+
+def parse_time(value):
+    """
+    (start, end) of the period a date or timestamp names, sized by its
+    precision: a whole day, hour, minute or second. Stored times are naive
+    local time, so values with a UTC offset are rejected.
+    """
+    match = TIMESTAMP.fullmatch(value)
+    if not match:
+        raise ValueError(f"invalid date {value!r}, expected YYYY-MM-DD[THH[:MM[:SS]]] without a timezone")
+    year, month, day, hour, minute, second, fraction = match.groups()
+    try:
+        start = datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                         int((fraction or '0').ljust(6, '0')))
+    except ValueError as e:
+        raise ValueError(f"invalid date {value!r}: {e}") from None
+    if fraction is not None:
+        width = timedelta(microseconds=10 ** (6 - len(fraction)))
+    elif second is not None:
+        width = timedelta(seconds=1)
+    elif minute is not None:
+        width = timedelta(minutes=1)
+    elif hour is not None:
+        width = timedelta(hours=1)
+    else:
+        width = timedelta(days=1)
+    return start, start + width
+
+
+def time_predicate(column, op, value):
+    start, end = parse_time(value)
+    if op == ':':
+        return TimeRange(column, start, end)
+    if op == '>':
+        return TimeRange(column, start=end)
+    if op == '>=':
+        return TimeRange(column, start=start)
+    if op == '<':
+        return TimeRange(column, end=start)
+    return TimeRange(column, end=end)
+
+
+def make_predicate(field, op, value):
+    column = FIELDS[field]
+    if column in TIME_COLUMNS:
+        return time_predicate(column, op, value)
+    if op != ':':
+        raise ValueError(f"{field} only supports ':', not {op!r}")
+    if column == 'mac_address':
+        return MacPattern(value)
+    if column == 'ip_address' and '/' in value:
+        return Network(value)
+    if '*' in value or '?' in value:
+        return Pattern(column, value)
+    return Equals(column, value)
+
+
+def parse(query: str):
+    """
+    Parse `query` into a list of predicates, or return None when it has no
+    `field:value` term (plain free text). Raises ValueError on malformed values.
+    """
+    predicates = []
+    structured = False
+    for match in TERM.finditer(query or ''):
+        field, op, value = match.groups()
+        value = value[1:-1] if len(value) >= 2 and value.startswith('"') and value.endswith('"') else value
+        if field and field.lower() in FIELDS:
+            if not value:
+                raise ValueError(f"missing value for {field}{op}")
+            predicates.append(make_predicate(field.lower(), op, value))
+            structured = True
+        elif value:
+            # Not one of ours (e.g. a MAC like 00:03:7f): keep the whole term as free text
+            predicates.append(FreeText(match.group(0) if field else value))
+    return predicates if structured else None
+
+
+class Plan:
+    """An index lookup for the most selective predicate, then an in-memory filter."""
+
+    def __init__(self, predicates):
+        # Stable sort: ties keep query order; predicates without an index go last
+        self.predicates = sorted(predicates, key=lambda p: (p.rank is None, p.rank or 0))
+        first = self.predicates[0] if self.predicates else None
+        self.index = first if first is not None and first.rank is not None else None
+
+    def where(self):
+        """(where clause, params) for the index lookup, or (None, None) for a full scan."""
+        return self.index.sql() if self.index else (None, None)
+
+    def matches(self, device):
+        return all(predicate.matches(device) for predicate in self.predicates)
+
+    def __repr__(self):
+        return f"Plan(index={self.index!r}, filter={self.predicates!r})"
+
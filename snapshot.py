@@ -0,0 +1,189 @@
+"""Memory-mapped device snapshot published by the parser and read by the webserver.
+
+After every poll the parser writes the whole `devices` table to `SNAPSHOT_PATH`
+in a compact binary layout and swaps it in with an atomic rename. Webserver
+workers map the file read-only, so all of them share one copy in the page
+cache and serve device lookups without a database round-trip.
+
+Layout (little-endian):
+
+    header   magic(8s) version(Q) record_count(I) string_count(I)
+             records_offset(I) strings_offset(I)
+    records  record_count x [id(q) + one string index(I) per STRING_FIELDS entry]
+    strings  (string_count + 1) x offset(I), followed by the UTF-8 blob
+
+Each distinct string is stored once; NULL is the index `NULL_INDEX`. The
+version is the publish time in nanoseconds since the epoch.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', '')
+# Ignore snapshots older than this many seconds (0 = never), e.g. if the parser died
+SNAPSHOT_MAX_AGE = int(os.getenv('SNAPSHOT_MAX_AGE', '0'))
+
+MAGIC = b'BGWSNAP1'
+HEADER = struct.Struct('<8sQIIII')
+STRING_FIELDS = ('mac_address', 'hostname', 'ip_address', 'device_type', 'first_seen', 'last_seen')
+RECORD = struct.Struct('<q' + 'I' * len(STRING_FIELDS))
+OFFSET = struct.Struct('<I')
+NULL_INDEX = 0xFFFFFFFF
+
+
+def write_snapshot(path, devices):
+    """Atomically replace `path` with a snapshot of `devices`.
+
+    `devices` are dicts with an `id` and the STRING_FIELDS keys, with values
+    already rendered as strings (or None), as returned by the API.
+    """
+    strings = {}
+    records = bytearray()
+    for device in devices:
+        indices = []
+        for field in STRING_FIELDS:
+            value = device.get(field)
+            if value is None:
+                indices.append(NULL_INDEX)
+            else:
+                indices.append(strings.setdefault(value, len(strings)))
+        records += RECORD.pack(device['id'], *indices)
+
+    blob = bytearray()
+    offsets = bytearray()
+    for value in strings:
+        offsets += OFFSET.pack(len(blob))
+        blob += value.encode('utf-8')
+    offsets += OFFSET.pack(len(blob))
+
+    records_offset = HEADER.size
+    strings_offset = records_offset + len(records)
+    header = HEADER.pack(MAGIC, time.time_ns(), len(devices), len(strings), records_offset, strings_offset)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(records)
+            f.write(offsets)
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class DeviceSnapshot:
+    """Read-only view over a mapped snapshot file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        magic, self.version, self.count, string_count, records_offset, strings_offset = \
+            HEADER.unpack_from(self._map, 0)
+        blob_offset = strings_offset + (string_count + 1) * OFFSET.size
+        if magic != MAGIC or strings_offset - records_offset != self.count * RECORD.size \
+                or blob_offset > len(self._map):
+            self._map.close()
+            raise ValueError(f"{path} is not a complete device snapshot")
+        self._view = memoryview(self._map)
+        self._records = self._view[records_offset:strings_offset]
+        self._offsets = self._view[strings_offset:blob_offset]
+        self._blob = self._view[blob_offset:]
+        self._strings = {}
+        self._indexes = {}
+
+    def age(self):
+        return time.time() - self.version / 1e9
+
+    def _string(self, index):
+        if index == NULL_INDEX:
+            return None
+        value = self._strings.get(index)
+        if value is None:
+            start, end = struct.unpack_from('<II', self._offsets, index * OFFSET.size)
+            value = str(self._blob[start:end], 'utf-8')
+            self._strings[index] = value
+        return value
+
+    def _device(self, record):
+        device = {'id': record[0]}
+        for field, index in zip(STRING_FIELDS, record[1:]):
+            device[field] = self._string(index)
+        return device
+
+    def devices(self, start=0, stop=None):
+        """Decode records [start:stop] into the same dict shape as webserver.query_devices."""
+        start, stop, _ = slice(start, stop).indices(self.count)
+        records = self._records[start * RECORD.size:max(start, stop) * RECORD.size]
+        return [self._device(record) for record in RECORD.iter_unpack(records)]
+
+    def find(self, field, value):
+        """Devices whose `field` equals `value` (case-insensitive, like MariaDB).
+
+        Only the matching records are decoded. The per-field lookup table is
+        built from the string indices on first use and kept for this snapshot.
+        """
+        index = self._indexes.get(field)
+        if index is None:
+            index = self._indexes[field] = self._build_index(STRING_FIELDS.index(field) + 1)
+        return [self._device(RECORD.unpack_from(self._records, position * RECORD.size))
+                for position in index.get(value.lower(), ())]
+
+    def _build_index(self, column):
+        """{lowercased value: [record positions]} for one STRING_FIELDS column."""
+        positions = {}
+        for position, record in enumerate(RECORD.iter_unpack(self._records)):
+            positions.setdefault(record[column], []).append(position)
+        index = {}
+        for string_index, matches in positions.items():
+            value = self._string(string_index)
+            if value is not None:
+                index.setdefault(value.lower(), []).extend(matches)
+        for matches in index.values():
+            matches.sort()
+        return index
+
+    def close(self):
+        self._records.release()
+        self._offsets.release()
+        self._blob.release()
+        self._view.release()
+        self._map.close()
+
+
+_current = None
+
+
+def load_snapshot(path=None):
+    """Return the latest snapshot at `path`, or None if unavailable or stale.
+
+    The mapping is reused until the parser swaps in a new file.
+    """
+    global _current
+    path = path or SNAPSHOT_PATH
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    try:
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if _current is None or _current.identity != identity:
+            previous, _current = _current, DeviceSnapshot(path)
+            if previous is not None:
+                previous.close()
+    except (OSError, ValueError, struct.error) as err:  # unreadable or truncated file
+        print(f"Snapshot unavailable, falling back to database: {err}")
+        return None
+    if SNAPSHOT_MAX_AGE and _current.age() > SNAPSHOT_MAX_AGE:
+        return None
+    return _current
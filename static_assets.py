@@ -0,0 +1,99 @@
+"""Precompressed, cacheable delivery of the legacy web UI in `legacy_ui/`.
+
+At startup the stylesheet and script are fingerprinted (`app.<hash>.css`) and
+every file is compressed once with gzip and, when the `brotli` package is
+installed, brotli. `index.html` references the fingerprinted URLs, so:
+
+- `/` is served with `Cache-Control: no-cache` and revalidates with a cheap 304;
+- `/static/app.<hash>.*` never changes and is cached for a year (`immutable`).
+
+Each representation has its own strong ETag, and responses carry
+`Vary: Accept-Encoding`.
+"""
+import gzip
+import hashlib
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # gzip-only when brotli isn't installed
+    brotli = None
+
+UI_DIR = Path(__file__).resolve().parent / 'legacy_ui'
+STATIC_PREFIX = '/static/'
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+}
+HTML_CACHE_CONTROL = 'no-cache'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class Asset:
+    """One file with its precompressed variants, keyed by content-coding."""
+
+    def __init__(self, body, content_type, cache_control):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {'identity': body}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.variants['br'] = compressed
+
+    def etag(self, encoding):
+        suffix = '' if encoding == 'identity' else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+    def negotiate(self, accept_encoding):
+        """Pick the smallest variant the client accepts."""
+        accepted, refused = set(), set()
+        for part in (accept_encoding or '').split(','):
+            coding, _, params = part.strip().partition(';')
+            coding = coding.strip().lower()
+            if re.search(r'q=0(\.0*)?\s*$', params):
+                refused.add(coding)
+            else:
+                accepted.add(coding)
+        for encoding in ('br', 'gzip'):
+            if encoding not in self.variants or encoding in refused:
+                continue
+            # `*` covers any coding the header doesn't name explicitly
+            if encoding in accepted or '*' in accepted:
+                return encoding
+        return 'identity'
+
+
+def fingerprinted_name(path, body):
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def build_legacy_ui(ui_dir=UI_DIR):
+    """Load and precompress the legacy UI; returns {url path: Asset}."""
+    assets = {}
+    html = (ui_dir / 'index.html').read_text(encoding='utf-8')
+    for name in ('app.css', 'app.js'):
+        path = ui_dir / name
+        body = path.read_bytes()
+        url = STATIC_PREFIX + fingerprinted_name(path, body)
+        assets[url] = Asset(body, CONTENT_TYPES[path.suffix], IMMUTABLE_CACHE_CONTROL)
+        html = html.replace('{{' + name + '}}', url)
+    assets['/'] = Asset(html.encode('utf-8'), CONTENT_TYPES['.html'], HTML_CACHE_CONTROL)
+    return assets
+
+
+def if_none_match(header, etag):
+    """True when an If-None-Match header matches `etag` (weak comparison, RFC 9110)."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = (candidate.strip() for candidate in header.split(','))
+    return any(candidate.removeprefix('W/') == etag for candidate in candidates)
@@ -0,0 +1,243 @@
+"""Storage backends shared by `parser.py` and `webserver.py`.
+
+`DB_BACKEND` selects where devices are stored:
+
+- `mariadb` (default): the MariaDB/MySQL server from `docker-compose.yml`,
+  configured with the `DB_*` environment variables.
+- `sqlite`: an embedded SQLite file (`SQLITE_PATH`) in WAL mode, for
+  single-node deployments that don't want to run a database server.
+
+Both return a connection with the subset of the mysql-connector API the rest
+of the code uses: `cursor(dictionary=...)`, `%s` placeholders, `fetchone`,
+`fetchall`, `fetchmany`, `commit`, `rollback` and `close`.
+"""
+import datetime
+import os
+import sqlite3
+
+import metrics
+
+DB_BACKEND = os.getenv('DB_BACKEND', 'mariadb').lower()
+DB_CONFIG = {
+    'user': os.getenv('DB_USER', 'root'),
+    'password': os.getenv('DB_PASSWORD', 'password'),
+    'host': os.getenv('DB_HOST', 'db'),
+    'database': os.getenv('DB_NAME', 'device_tracker'),
+    'raise_on_warnings': True
+}
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'device_tracker.db')
+
+# SQLite equivalent of init.sql; keep the two in sync. Text columns are NOCASE to
+# match MariaDB's case-insensitive default collation, which also lets the
+# indexes serve LIKE 'prefix%' lookups.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mac_address VARCHAR(17) COLLATE NOCASE,
+    hostname VARCHAR(255) COLLATE NOCASE,
+    ip_address VARCHAR(45) COLLATE NOCASE,
+    device_type VARCHAR(50) COLLATE NOCASE,
+    first_seen DATETIME,
+    last_seen DATETIME,
+    UNIQUE (hostname, ip_address)
+);
+
+-- Secondary indexes for /search filters; hostname lookups use the unique key
+CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices (ip_address);
+CREATE INDEX IF NOT EXISTS idx_devices_mac ON devices (mac_address);
+CREATE INDEX IF NOT EXISTS idx_devices_type ON devices (device_type);
+CREATE INDEX IF NOT EXISTS idx_devices_last_seen ON devices (last_seen);
+CREATE INDEX IF NOT EXISTS idx_devices_first_seen ON devices (first_seen);
+
+CREATE TABLE IF NOT EXISTS device_type_stats (
+    device_type VARCHAR(50) PRIMARY KEY,
+    total_devices INT NOT NULL DEFAULT 0,
+    online_devices INT NOT NULL DEFAULT 0,
+    updated_at DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS device_activity_stats (
+    bucket VARCHAR(4) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    device_type VARCHAR(50) NOT NULL,
+    new_devices INT NOT NULL DEFAULT 0,
+    peak_online INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, bucket_start, device_type)
+);
+"""
+
+# DATETIME columns come back as datetime objects, like they do from MariaDB
+sqlite3.register_converter('DATETIME', lambda value: datetime.datetime.fromisoformat(value.decode()))
+
+_sqlite_initialized = set()
+_mariadb_initialized = False
+
+# Tables and indexes added after the first release. init.sql only runs on an empty MariaDB
+# data dir, so existing installs get them on the first connection instead.
+MARIADB_MIGRATIONS = (
+    """
+    CREATE TABLE IF NOT EXISTS device_type_stats (
+        device_type VARCHAR(50) PRIMARY KEY,
+        total_devices INT NOT NULL DEFAULT 0,
+        online_devices INT NOT NULL DEFAULT 0,
+        updated_at DATETIME
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS device_activity_stats (
+        bucket VARCHAR(4) NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        device_type VARCHAR(50) NOT NULL,
+        new_devices INT NOT NULL DEFAULT 0,
+        peak_online INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, bucket_start, device_type)
+    )
+    """,
+    # Secondary indexes used by the /search planner (MariaDB syntax; MySQL lacks IF NOT EXISTS)
+    "CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices (ip_address)",
+    "CREATE INDEX IF NOT EXISTS idx_devices_mac ON devices (mac_address)",
+    "CREATE INDEX IF NOT EXISTS idx_devices_type ON devices (device_type)",
+    "CREATE INDEX IF NOT EXISTS idx_devices_last_seen ON devices (last_seen)",
+    "CREATE INDEX IF NOT EXISTS idx_devices_first_seen ON devices (first_seen)",
+)
+
+
+class SQLiteCursor:
+    """Adapts a sqlite3 cursor to the mysql-connector calling conventions."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def _row(self, row):
+        if row is None:
+            return None
+        return dict(row) if self._dictionary else tuple(row)
+
+    def execute(self, query, params=()):
+        params = tuple(
+            value.isoformat(' ') if isinstance(value, datetime.datetime) else value
+            for value in params
+        )
+        self._cursor.execute(query.replace('%s', '?'), params)
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Adapts a sqlite3 connection to the mysql-connector calling conventions."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def backfill_rollups(conn):
+    """Seed the per-type totals from `devices` when the rollups start out empty."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM device_type_stats")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO device_type_stats (device_type, total_devices)
+                SELECT COALESCE(NULLIF(device_type, ''), 'Unknown'), COUNT(*) FROM devices
+                GROUP BY COALESCE(NULLIF(device_type, ''), 'Unknown')
+            """)
+        conn.commit()
+    except Exception as err:
+        # e.g. another process backfilled first; the rollups are best-effort
+        conn.rollback()
+        print(f"Rollup backfill error: {err}")
+    finally:
+        cursor.close()
+
+
+def connect_mariadb():
+    global _mariadb_initialized
+    try:
+        # Import here so a lightweight import of this module (for testing parse logic
+        # or running on SQLite) doesn't require mysql connector to be installed.
+        import mysql.connector
+        conn = mysql.connector.connect(**DB_CONFIG)
+    except Exception as err:
+        print(f"Database connection error: {err}")
+        return None
+    if not _mariadb_initialized:
+        cursor = conn.cursor()
+        try:
+            # "Table already exists" notes would trip raise_on_warnings
+            cursor.execute("SET SESSION sql_notes = 0")
+            for statement in MARIADB_MIGRATIONS:
+                cursor.execute(statement)
+            cursor.execute("SET SESSION sql_notes = 1")
+        except Exception as err:
+            print(f"Schema migration error: {err}")
+        else:
+            backfill_rollups(conn)
+            _mariadb_initialized = True
+        finally:
+            cursor.close()
+    return conn
+
+
+def connect_sqlite():
+    try:
+        conn = sqlite3.connect(SQLITE_PATH, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        # WAL lets the webserver read while the parser writes; NORMAL sync is
+        # durable across application crashes and much cheaper than FULL.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if SQLITE_PATH not in _sqlite_initialized:
+            conn.executescript(SQLITE_SCHEMA)
+            backfill_rollups(SQLiteConnection(conn))
+            _sqlite_initialized.add(SQLITE_PATH)
+        return SQLiteConnection(conn)
+    except sqlite3.Error as err:
+        print(f"Database connection error: {err}")
+        return None
+
+
+BACKENDS = {
+    'mariadb': connect_mariadb,
+    'sqlite': connect_sqlite,
+}
+
+
+def get_db_connection():
+    """Open a connection to the configured backend, or return None on failure."""
+    connect = BACKENDS.get(DB_BACKEND)
+    if connect is None:
+        print(f"Unknown DB_BACKEND {DB_BACKEND!r}; expected one of {', '.join(BACKENDS)}")
+        return None
+    with metrics.DB_CONNECT_SECONDS.labels(DB_BACKEND).time():
+        return connect()
@@ -0,0 +1,42 @@
+"""Shared fixtures: run the DB-backed tests against every storage backend.
+
+SQLite always runs. MariaDB runs only when TEST_MARIADB=1, using the DB_*
+environment variables; point those at a scratch database, as the tables are
+emptied before each test.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import storage
+
+TABLES = ('devices', 'device_type_stats', 'device_activity_stats')
+
+
+@pytest.fixture(params=['sqlite', 'mariadb'])
+def backend(request, tmp_path, monkeypatch):
+    if request.param == 'mariadb' and os.getenv('TEST_MARIADB') != '1':
+        pytest.skip("set TEST_MARIADB=1 to run against MariaDB")
+    monkeypatch.setattr(storage, 'DB_BACKEND', request.param)
+    monkeypatch.setattr(storage, 'SQLITE_PATH', str(tmp_path / 'devices.db'))
+
+    conn = storage.get_db_connection()
+    if conn is None:
+        pytest.fail(f"could not connect to {request.param}")
+    cursor = conn.cursor()
+    for table in TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return request.param
+
+
+def device(hostname, ip, device_type='Ethernet', status='on', mac=None):
+    return {'hostname': hostname, 'ip_address': ip, 'mac_address': mac,
+            'device_type': device_type, 'status': status}
@@ -0,0 +1,50 @@
+"""Parser and webserver hot paths are recorded in the Prometheus metrics."""
+import socket
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import metrics
+import parser
+import webserver
+from conftest import device
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_poll_counts_rows(backend):
+    inserted = sample('bgw320_poll_rows_total', action='inserted')
+    updated = sample('bgw320_poll_rows_total', action='updated')
+    parser.update_database([device('pi', '192.168.1.10'), device('tv', '192.168.1.11')])
+    parser.update_database([device('pi', '192.168.1.10')])
+    assert sample('bgw320_poll_rows_total', action='inserted') == inserted + 2
+    assert sample('bgw320_poll_rows_total', action='updated') == updated + 1
+
+
+def test_metrics_endpoint_labels_routes(backend):
+    labels = {'method': 'GET', 'endpoint': '/devices/{identifier}', 'status': '200'}
+    before = sample('bgw320_http_request_seconds_count', **labels)
+    client = TestClient(webserver.app)
+    client.get('/devices/192.168.1.10')
+    client.get('/devices/pi')
+    assert sample('bgw320_http_request_seconds_count', **labels) == before + 2
+
+    body = client.get('/metrics').text
+    # One series per route template, not per identifier
+    assert 'bgw320_http_request_seconds_bucket{endpoint="/devices/{identifier}"' in body
+    assert '/devices/pi"' not in body
+    assert 'bgw320_http_result_rows_bucket{endpoint="/devices/{identifier}"' in body
+
+
+def test_metrics_port_in_use(monkeypatch, capsys):
+    with socket.socket() as taken:
+        taken.bind(('', 0))
+        taken.listen()
+        monkeypatch.setattr(metrics, 'PARSER_METRICS_PORT', taken.getsockname()[1])
+        assert parser.start_metrics_server() is False
+    assert 'Metrics server disabled' in capsys.readouterr().out
+
+    monkeypatch.setattr(metrics, 'PARSER_METRICS_PORT', 0)
+    assert parser.start_metrics_server() is False
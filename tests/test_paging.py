@@ -0,0 +1,46 @@
+"""limit / offset paging and X-Total-Count on /devices and /search."""
+from fastapi.testclient import TestClient
+
+import parser
+import snapshot
+import webserver
+from conftest import device
+
+
+def ids(response):
+    return [d['id'] for d in response.json()]
+
+
+def check_paging(client):
+    everything = client.get('/devices')
+    assert everything.headers['x-total-count'] == '5'
+    all_ids = ids(everything)
+    assert all_ids == sorted(all_ids)
+
+    pages = [client.get('/devices', params={'limit': 2, 'offset': offset}) for offset in (0, 2, 4)]
+    assert [ids(page) for page in pages] == [all_ids[0:2], all_ids[2:4], all_ids[4:]]
+    assert {page.headers['x-total-count'] for page in pages} == {'5'}
+    assert ids(client.get('/devices', params={'limit': 2, 'offset': 10})) == []
+    assert ids(client.get('/devices', params={'offset': 3})) == all_ids[3:]
+
+    matches = client.get('/search', params={'q': '192.168.1', 'limit': 2, 'offset': 1})
+    assert matches.headers['x-total-count'] == '3'
+    assert ids(matches) == all_ids[1:3]
+    assert client.get('/devices', params={'limit': 0}).status_code == 422
+
+
+def seed():
+    parser.update_database([device(f'host{i}', f'192.168.1.{i}') for i in range(3)]
+                           + [device('phone', '10.0.0.5', 'Wi-Fi'), device('tv', '10.0.0.6')])
+
+
+def test_paging(backend):
+    seed()
+    check_paging(TestClient(webserver.app))
+
+
+def test_paging_from_snapshot(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_PATH', str(tmp_path / 'devices.snap'))
+    monkeypatch.setattr(snapshot, '_current', None)
+    seed()
+    check_paging(TestClient(webserver.app))
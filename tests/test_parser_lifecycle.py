@@ -0,0 +1,48 @@
+"""Parser startup and shutdown: waiting for the database and stopping on a signal."""
+import os
+import signal
+import time
+
+import pytest
+
+import parser
+
+
+def test_wait_for_db_backs_off(monkeypatch):
+    class Conn:
+        def close(self):
+            pass
+    results = [None, None, None, Conn()]
+    delays = []
+    monkeypatch.setattr(parser, 'get_db_connection', lambda: results.pop(0))
+    monkeypatch.setattr(parser, 'sleep_unless_stopped', delays.append)
+    assert parser.wait_for_db(timeout=60, initial_delay=0.1, max_delay=0.3)
+    assert delays == [0.1, 0.2, 0.3]
+
+
+def test_stop_signal_ends_loop_without_waiting(monkeypatch):
+    polls = []
+
+    def poll_once():
+        polls.append(1)
+        # Signal arrives mid-poll: the poll finishes, then the loop exits
+        os.kill(os.getpid(), signal.SIGTERM)
+        return []
+    monkeypatch.setattr(parser, '_stop_requested', False)
+    monkeypatch.setattr(parser, 'POLL_INTERVAL', 3600)
+    monkeypatch.setattr(parser, 'wait_for_db', lambda: True)
+    monkeypatch.setattr(parser, 'start_metrics_server', lambda: False)
+    monkeypatch.setattr(parser, 'poll_once', poll_once)
+    handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+    try:
+        start = time.monotonic()
+        parser.main()
+        assert time.monotonic() - start < 1
+        assert polls == [1]
+
+        # A second signal aborts the in-flight work
+        with pytest.raises(KeyboardInterrupt):
+            parser.handle_stop_signal(signal.SIGTERM, None)
+    finally:
+        signal.signal(signal.SIGTERM, handlers[0])
+        signal.signal(signal.SIGINT, handlers[1])
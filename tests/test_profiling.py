@@ -0,0 +1,38 @@
+"""Sampling decision and size cap of the opt-in profiler."""
+import os
+
+import profiling
+
+
+def test_sampling_decision(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 0)
+    assert profiling.profiled('poll') is profiling._NOT_SAMPLED
+
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 0.5)
+    monkeypatch.setattr(profiling.random, 'random', lambda: 0.7)
+    assert profiling.profiled('poll') is profiling._NOT_SAMPLED
+    monkeypatch.setattr(profiling.random, 'random', lambda: 0.2)
+    with profiling.profiled('request-GET-/devices/{identifier}'):
+        # cProfile can't nest: a second block while one is active isn't sampled
+        assert profiling.profiled('poll') is profiling._NOT_SAMPLED
+    assert not profiling._active
+
+    [name] = os.listdir(tmp_path)
+    assert name.startswith('request-GET-_devices_identifier-') and name.endswith('.prof')
+
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', '')
+    assert profiling.profiled('poll') is profiling._NOT_SAMPLED
+
+
+def test_cap_removes_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, 'PROFILE_MAX_MB', 2.5 / 1024)  # 2.5 KiB
+    for age, name in enumerate(('newest', 'middle', 'oldest')):
+        path = tmp_path / f"{name}.prof"
+        path.write_bytes(b'x' * 1024)
+        os.utime(path, (1000 - age, 1000 - age))
+    (tmp_path / 'notes.txt').write_bytes(b'x' * 4096)
+
+    profiling._enforce_cap()
+    assert sorted(os.listdir(tmp_path)) == ['middle.prof', 'newest.prof', 'notes.txt']
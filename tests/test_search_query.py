@@ -0,0 +1,113 @@
+"""The /search filter grammar: parsing, planning and results against every backend."""
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import parser
+import search_query
+import snapshot
+import storage
+import webserver
+from conftest import device
+
+
+def test_free_text_is_not_parsed():
+    assert search_query.parse('pi') is None
+    assert search_query.parse('00:03:7f') is None
+    assert search_query.parse('192.168.1.0/24') is None
+
+
+def test_plan_prefers_most_selective_index():
+    plan = search_query.Plan(search_query.parse('type:Wi-Fi seen>2026-10-01 host:pi* ip:192.168.1.10'))
+    assert plan.where() == ('ip_address = %s', ('192.168.1.10',))
+    assert [p.rank for p in plan.predicates] == [search_query.RANK_UNIQUE, search_query.RANK_PREFIX,
+                                                 search_query.RANK_RANGE, search_query.RANK_TYPE]
+
+    plan = search_query.Plan(search_query.parse('type:Wi-Fi ip:10.1.0.0/16'))
+    assert plan.where() == ("ip_address LIKE %s ESCAPE '!'", ('10.1.%',))
+
+    # Leading wildcards and free text can't use an index
+    plan = search_query.Plan(search_query.parse('host:*tv phone'))
+    assert plan.where() == (None, None)
+
+
+def test_values():
+    [mac] = search_query.parse('mac:00-03-7F*')
+    assert mac.sql() == ("mac_address LIKE %s ESCAPE '!'", ('00:03:7f%',))
+    assert mac.matches({'mac_address': '00:03:7f:12:a6:a6'})
+
+    [seen] = search_query.parse('seen:2026-10-01')
+    assert seen.start == datetime.datetime(2026, 10, 1)
+    assert seen.end == datetime.datetime(2026, 10, 2)
+    assert seen.matches({'last_seen': '2026-10-01T23:59:59'})
+    assert not seen.matches({'last_seen': '2026-10-02T00:00:00'})
+
+    [seen] = search_query.parse('seen:2026-10-19T04')
+    assert (seen.start, seen.end) == (datetime.datetime(2026, 10, 19, 4), datetime.datetime(2026, 10, 19, 5))
+    assert seen.matches({'last_seen': '2026-10-19T04:54:14'})
+    [seen] = search_query.parse('seen>2026-10-19T04:54')
+    assert seen.start == datetime.datetime(2026, 10, 19, 4, 55)
+    assert not seen.matches({'last_seen': '2026-10-19T04:54:59'})
+    [seen] = search_query.parse('seen<=2026-10-19T04:54:14')
+    assert seen.end == datetime.datetime(2026, 10, 19, 4, 54, 15)
+
+    [host] = search_query.parse('host:"living room_tv*"')
+    assert host.sql() == ("hostname LIKE %s ESCAPE '!'", ('living room!_tv%',))
+
+    for bad in ('seen>yesterday', 'seen>2026-10-01T00:00Z', 'seen>2026-10-01T00:00+00:00', 'seen:2026-13-01',
+                'ip:10.0.0.0/33', 'host>pi', 'type:'):
+        with pytest.raises(ValueError):
+            search_query.parse(bad)
+
+
+@pytest.fixture(params=['database', 'snapshot'])
+def source(request, tmp_path, monkeypatch):
+    """Serve searches from the database, or from a published snapshot."""
+    path = str(tmp_path / 'devices.snap') if request.param == 'snapshot' else ''
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_PATH', path)
+    monkeypatch.setattr(snapshot, '_current', None)
+    return request.param
+
+
+def test_search_filters(backend, source, monkeypatch):
+    parser.update_database([
+        device('pi', '192.168.1.10'),
+        device('pihole', '192.168.1.11', 'Wi-Fi'),
+        device('phone', '10.0.0.5', 'Wi-Fi'),
+        device('unknown00037f12a6a6', None, 'Wi-Fi', mac='00:03:7f:12:a6:a6'),
+    ])
+
+    def hostnames(query):
+        return sorted(d['hostname'] for d in webserver.search_devices(query))
+
+    today = datetime.date.today()
+    assert hostnames('type:wi-fi host:pi*') == ['pihole']
+    assert hostnames('ip:192.168.1.0/24') == ['pi', 'pihole']
+    assert hostnames('mac:00037f*') == ['unknown00037f12a6a6']
+    assert hostnames('host:PI') == ['pi']
+    assert hostnames(f'seen:{today}') == hostnames('') == ['phone', 'pi', 'pihole', 'unknown00037f12a6a6']
+    assert hostnames(f'seen>{today}') == []
+    assert hostnames('type:Wi-Fi ph') == ['phone']
+    assert hostnames('ip:192.168.1.10') == ['pi']
+    assert hostnames('mac:00-03-7F-12-A6-A6 type:wi-fi') == ['unknown00037f12a6a6']
+    assert hostnames('host:*hole') == ['pihole']
+    # Free text still matches any field
+    assert hostnames('192.168.1.1') == ['pi', 'pihole']
+
+    # One poll, so every row shares a last_seen; hour and minute prefixes both match it
+    last_seen = webserver.search_devices('host:pi')[0]['last_seen']
+    assert len(hostnames(f"seen:{last_seen[:13]}")) == 4
+    assert len(hostnames(f"seen:{last_seen[:16]}")) == 4
+    assert hostnames(f"seen>{last_seen[:16]}") == []
+    for q in ('seen>tomorrow', 'seen>2026-10-01T00:00Z'):
+        response = TestClient(webserver.app).get('/search', params={'q': q})
+        assert response.status_code == 400
+
+    if source == 'snapshot':
+        # Exact lookups and unindexed plans are answered without the database
+        monkeypatch.setattr(storage, 'DB_BACKEND', 'unavailable')
+        assert hostnames('ip:192.168.1.10 host:p*') == ['pi']
+        assert hostnames('mac:00:03:7f:12:a6:a6') == ['unknown00037f12a6a6']
+        assert hostnames('type:Wi-Fi') == ['phone', 'pihole', 'unknown00037f12a6a6']
+        assert hostnames('host:*hole') == ['pihole']
@@ -0,0 +1,69 @@
+"""The webserver serves the parser's memory-mapped snapshot in place of the database."""
+import parser
+import snapshot
+import storage
+import webserver
+from conftest import device
+
+
+def test_roundtrip(tmp_path):
+    devices = [
+        {'id': 1, 'mac_address': None, 'hostname': 'pi', 'ip_address': '192.168.1.10',
+         'device_type': 'Ethernet', 'first_seen': '2026-10-01T10:00:00', 'last_seen': '2026-10-02T10:00:00'},
+        {'id': 2, 'mac_address': '00:11:22:33:44:55', 'hostname': 'ünïcode', 'ip_address': 'Unknown',
+         'device_type': 'Wi-Fi', 'first_seen': '2026-10-01T10:00:00', 'last_seen': '2026-10-01T10:00:00'},
+    ]
+    path = tmp_path / 'devices.snap'
+    snapshot.write_snapshot(str(path), devices)
+    current = snapshot.DeviceSnapshot(str(path))
+    assert current.count == 2
+    assert current.devices() == devices
+    assert current.devices(1) == devices[1:]
+    assert current.devices(0, 1) == devices[:1]
+    assert current.devices(5, 10) == []
+
+    assert current.find('hostname', 'ÜNÏCODE') == devices[1:]
+    assert current.find('first_seen', '2026-10-01T10:00:00') == devices
+    assert current.find('mac_address', 'missing') == []
+    current.close()
+
+    # A lookup decodes the looked-up column and the matching records only
+    current = snapshot.DeviceSnapshot(str(path))
+    assert current.find('ip_address', 'unknown') == devices[1:]
+    assert 'pi' not in current._strings.values()
+    current.close()
+
+
+def test_webserver_reads_snapshot(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_PATH', str(tmp_path / 'devices.snap'))
+    monkeypatch.setattr(snapshot, '_current', None)
+    parser.update_database([device('pi', '192.168.1.10'), device('Phone', '10.0.0.5', 'Wi-Fi')])
+    from_db = webserver.query_devices()
+
+    # With the database gone, reads still succeed from the snapshot
+    monkeypatch.setattr(storage, 'DB_BACKEND', 'unavailable')
+    assert webserver.load_devices() == from_db
+    assert [d['hostname'] for d in webserver.load_devices('hostname', 'phone')] == ['Phone']
+    assert [d['hostname'] for d in webserver.search_devices('192.168.1.0/24')] == ['pi']
+
+
+def test_falls_back_to_database(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_PATH', str(tmp_path / 'missing.snap'))
+    monkeypatch.setattr(snapshot, '_current', None)
+    parser.update_database([device('pi', '192.168.1.10')])
+    (tmp_path / 'missing.snap').unlink()
+    assert [d['hostname'] for d in webserver.load_devices()] == ['pi']
+
+
+def test_failed_publish_removes_stale_snapshot(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_PATH', str(tmp_path / 'devices.snap'))
+    monkeypatch.setattr(snapshot, '_current', None)
+    parser.update_database([device('pi', '192.168.1.10')])
+    assert (tmp_path / 'devices.snap').exists()
+
+    def fail(path, devices):
+        raise OSError("disk full")
+    monkeypatch.setattr(snapshot, 'write_snapshot', fail)
+    parser.update_database([device('pi', '192.168.1.10'), device('tv', '192.168.1.11')])
+    assert not (tmp_path / 'devices.snap').exists()
+    assert [d['hostname'] for d in webserver.load_devices()] == ['pi', 'tv']
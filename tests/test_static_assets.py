@@ -0,0 +1,74 @@
+"""Content negotiation, ETags and caching headers for the precompressed legacy UI."""
+import re
+
+from fastapi.testclient import TestClient
+
+import static_assets
+import webserver
+
+BODY = b'body { color: red; }\n' * 50
+
+
+def test_negotiate():
+    asset = static_assets.Asset(BODY, 'text/css', static_assets.IMMUTABLE_CACHE_CONTROL)
+    assert 'gzip' in asset.variants
+    assert asset.negotiate('gzip, deflate') == 'gzip'
+    assert asset.negotiate('gzip;q=0, deflate') == 'identity'
+    assert asset.negotiate('gzip;q=0.0') == 'identity'
+    assert asset.negotiate('deflate') == 'identity'
+    assert asset.negotiate(None) == 'identity'
+    if 'br' in asset.variants:
+        assert asset.negotiate('*') == 'br'
+        assert asset.negotiate('br;q=0, *') == 'gzip'
+    else:
+        assert asset.negotiate('*') == 'gzip'
+    assert asset.negotiate('gzip;q=0, *') in ('br', 'identity')
+    assert asset.etag('identity') != asset.etag('gzip')
+
+
+def test_if_none_match():
+    etag = '"abc123"'
+    assert static_assets.if_none_match(etag, etag)
+    assert static_assets.if_none_match('W/"abc123"', etag)
+    assert static_assets.if_none_match('"other", W/"abc123"', etag)
+    assert static_assets.if_none_match('*', etag)
+    assert not static_assets.if_none_match('"other"', etag)
+    assert not static_assets.if_none_match(None, etag)
+
+
+def test_index_revalidates():
+    client = TestClient(webserver.app)
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['cache-control'] == 'no-cache'
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    etag = response.headers['etag']
+
+    cached = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+    assert cached.headers['etag'] == etag
+    assert 'Accept-Encoding' in cached.headers['vary']
+    assert 'content-encoding' not in cached.headers
+
+    # The gzip ETag doesn't validate the identity representation
+    plain = client.get('/', headers={'Accept-Encoding': 'identity', 'If-None-Match': etag})
+    assert plain.status_code == 200
+    assert 'content-encoding' not in plain.headers
+
+
+def test_fingerprinted_assets_are_immutable():
+    client = TestClient(webserver.app)
+    html = client.get('/').text
+    urls = re.findall(r'/static/app\.[0-9a-f]+\.(?:css|js)', html)
+    assert len(urls) == 2
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'immutable' in response.headers['cache-control']
+        assert 'max-age=31536000' in response.headers['cache-control']
+        assert client.get(url, headers={'If-None-Match': response.headers['etag']}).status_code == 304
+
+    assert client.get('/static/app.css').status_code == 404
+    assert client.get('/static/app.0000000000.js').status_code == 404
@@ -0,0 +1,101 @@
+"""Exercise update_database / query_devices / stats against every storage backend."""
+import datetime
+
+import parser
+import storage
+import webserver
+from conftest import device
+
+
+def test_insert_then_update(backend):
+    parser.update_database([device('pi', '192.168.1.10'), device('unknown001122334455', None, 'Wi-Fi',
+                                                                  mac='00:11:22:33:44:55')])
+    rows = webserver.query_devices()
+    assert {row['hostname'] for row in rows} == {'pi', 'unknown001122334455'}
+    first_seen = {row['hostname']: row['first_seen'] for row in rows}
+    assert all(isinstance(value, str) for value in first_seen.values())
+
+    parser.update_database([device('pi', '192.168.1.10', 'Wi-Fi')])
+    rows = webserver.query_devices("hostname = %s", ('pi',))
+    assert len(rows) == 1
+    assert rows[0]['device_type'] == 'Wi-Fi'
+    assert rows[0]['first_seen'] == first_seen['pi']
+    assert rows[0]['last_seen'] >= rows[0]['first_seen']
+
+    unknown_ip = webserver.query_devices("ip_address = %s", ('Unknown',))
+    assert unknown_ip[0]['mac_address'] == '00:11:22:33:44:55'
+
+
+def test_search(backend):
+    parser.update_database([device('pi', '192.168.1.10'), device('phone', '10.0.0.5', 'Wi-Fi')])
+    assert [d['hostname'] for d in webserver.search_devices('192.168.1.0/24')] == ['pi']
+    assert [d['hostname'] for d in webserver.search_devices('ph*')] == ['phone']
+    assert len(webserver.search_devices('')) == 2
+
+
+def test_stats_rollups(backend):
+    parser.update_database([device('pi', '192.168.1.10'), device('tv', '192.168.1.11', status='off'),
+                            device('phone', '10.0.0.5', 'Wi-Fi')])
+    parser.update_database([device('pi', '192.168.1.10', status='off'), device('phone', '10.0.0.5', 'Wi-Fi'),
+                            device('tablet', '10.0.0.6', 'Wi-Fi')])
+
+    stats = webserver.get_stats('day')
+    by_type = {row['device_type']: row for row in stats['by_type']}
+    assert by_type['Ethernet']['total_devices'] == 2
+    assert by_type['Ethernet']['online_devices'] == 0
+    assert by_type['Wi-Fi']['total_devices'] == 2
+    assert by_type['Wi-Fi']['online_devices'] == 2
+    assert stats['totals'] == {'total_devices': 4, 'online_devices': 2}
+
+    today = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+    trend = {row['device_type']: row for row in stats['trend'] if row['bucket_start'] == today}
+    assert trend['Ethernet']['new_devices'] == 2
+    assert trend['Ethernet']['peak_online'] == 1
+    assert trend['Wi-Fi']['new_devices'] == 2
+    assert trend['Wi-Fi']['peak_online'] == 2
+
+
+def test_interrupted_poll_rolls_back(backend, monkeypatch):
+    parser.update_database([device('pi', '192.168.1.10')])
+
+    def interrupt(*args):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(parser, 'update_stats', interrupt)
+    try:
+        parser.update_database([device('pi', '192.168.1.10', 'Wi-Fi'), device('tv', '192.168.1.11')])
+    except KeyboardInterrupt:
+        pass
+    else:
+        raise AssertionError("update_database swallowed the interrupt")
+
+    rows = webserver.query_devices()
+    assert [(row['hostname'], row['device_type']) for row in rows] == [('pi', 'Ethernet')]
+
+
+def test_stats_failure_keeps_devices(backend, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("no such table: device_type_stats")
+    monkeypatch.setattr(parser, 'update_stats', fail)
+    parser.update_database([device('pi', '192.168.1.10')])
+
+    assert [row['hostname'] for row in webserver.query_devices()] == ['pi']
+    assert webserver.get_stats()['by_type'] == []
+
+
+def test_rollups_backfilled_from_devices(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'DB_BACKEND', 'sqlite')
+    monkeypatch.setattr(storage, 'SQLITE_PATH', str(tmp_path / 'devices.db'))
+    parser.update_database([device('pi', '192.168.1.10'), device('tv', '192.168.1.11'),
+                            device('phone', '10.0.0.5', None)])
+
+    # A database from before the rollups: stats tables missing
+    conn = storage.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE device_type_stats")
+    cursor.execute("DROP TABLE device_activity_stats")
+    conn.commit()
+    conn.close()
+    storage._sqlite_initialized.discard(storage.SQLITE_PATH)
+
+    totals = {row['device_type']: row['total_devices'] for row in webserver.get_stats()['by_type']}
+    assert totals == {'Ethernet': 2, 'Unknown': 1}
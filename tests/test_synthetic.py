@@ -0,0 +1,17 @@
+"""Synthetic router pages must parse exactly like the gateway's own markup."""
+from benchmarks.synthetic import make_hosts, render_router_page
+from parser import parse_router_page
+
+
+def test_synthetic_page_parses():
+    hosts = make_hosts(200, seed=1)
+    devices = parse_router_page(render_router_page(hosts))
+    assert len(devices) == len(hosts)
+    for host, device in zip(hosts, devices):
+        assert device['hostname'] == host['hostname']
+        assert device['status'] == host['status']
+        assert device['device_type'] == host['connection']
+        if host['status'] == 'on':
+            assert device['ip_address'] == host['ip']
+        if host['hostname'].startswith('unknown'):
+            assert device['mac_address'].replace(':', '') == host['hostname'][len('unknown'):]
@@ -1,39 +1,150 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import axios from 'axios';
 import { motion } from 'framer-motion';
 import { FaSearch, FaWifi, FaNetworkWired, FaDesktop, FaServer } from 'react-icons/fa';
+import VirtualGrid from './VirtualGrid';
+
+const PAGE_SIZE = 200;
+const DEBOUNCE_MS = 300;
+const CACHE_SIZE = 20;
+// Devices change every parser poll (POLL_INTERVAL, 100s by default)
+const CACHE_TTL_MS = 100 * 1000;
+// Fixed card height so the grid can be windowed
+const CARD_HEIGHT = 224;
+
+// Recently fetched queries, most recently used last: query -> { value: { items, total }, fetchedAt }
+const queryCache = new Map();
+
+function cacheGet(key) {
+    const entry = queryCache.get(key);
+    if (!entry) return undefined;
+    queryCache.delete(key);
+    if (Date.now() - entry.fetchedAt > CACHE_TTL_MS) return undefined;
+    queryCache.set(key, entry);
+    return entry.value;
+}
+
+function cachePut(key, value, fetchedAt = Date.now()) {
+    queryCache.delete(key);
+    queryCache.set(key, { value, fetchedAt });
+    while (queryCache.size > CACHE_SIZE) {
+        queryCache.delete(queryCache.keys().next().value);
+    }
+}
+
+// Servers without paging ignore limit/offset and send no X-Total-Count, in which
+// case the response is the complete result set.
+async function fetchPage(searchQuery, offset, signal) {
+    const endpoint = searchQuery ? '/api/search' : '/api/devices';
+    const params = { limit: PAGE_SIZE, offset };
+    if (searchQuery) params.q = searchQuery;
+    const response = await axios.get(endpoint, { params, signal });
+    const total = response.headers['x-total-count'];
+    return {
+        items: response.data,
+        total: total !== undefined ? Number(total) : offset + response.data.length,
+    };
+}
+
+function deviceKey(device) {
+    return device.id ?? `${device.hostname}|${device.ip_address}`;
+}
 
 function App() {
     const [query, setQuery] = useState('');
-    const [results, setResults] = useState([]);
+    const [activeQuery, setActiveQuery] = useState('');
+    const [results, setResults] = useState({ items: [], total: 0 });
     const [loading, setLoading] = useState(false);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const [hasSearched, setHasSearched] = useState(false);
+    const controllerRef = useRef(null);
+    const inflightQueryRef = useRef(null);
+    const typedRef = useRef(false);
 
-    const search = async (searchQuery) => {
-        setLoading(true);
+    // Typing reuses recent results; an explicit Search / Show All always refetches
+    const search = useCallback(async (searchQuery, { fresh = false } = {}) => {
+        // Submitting while the debounced search for the same text is in flight
+        if (inflightQueryRef.current === searchQuery) return;
+        // A newer search supersedes any request still in flight
+        controllerRef.current?.abort();
+        inflightQueryRef.current = null;
         setError(null);
         setHasSearched(true);
+        setActiveQuery(searchQuery);
+        setLoadingMore(false);
+
+        const cached = fresh ? undefined : cacheGet(searchQuery);
+        if (cached) {
+            setResults(cached);
+            setLoading(false);
+            return;
+        }
+
+        const controller = new AbortController();
+        controllerRef.current = controller;
+        inflightQueryRef.current = searchQuery;
+        setLoading(true);
         try {
-            const endpoint = searchQuery ? `/api/search?q=${encodeURIComponent(searchQuery)}` : '/api/devices';
-            const response = await axios.get(endpoint);
-            setResults(response.data);
+            const page = await fetchPage(searchQuery, 0, controller.signal);
+            cachePut(searchQuery, page);
+            setResults(page);
         } catch (err) {
+            if (axios.isCancel(err)) return;
             setError('Failed to fetch results. Please try again.');
             console.error(err);
         } finally {
-            setLoading(false);
+            if (controllerRef.current === controller) {
+                inflightQueryRef.current = null;
+                setLoading(false);
+            }
+        }
+    }, []);
+
+    const loadMore = useCallback(async () => {
+        // Stop paging after a failure; the next search clears the error
+        if (loading || loadingMore || error || results.items.length >= results.total) return;
+        const searchQuery = activeQuery;
+        const controller = new AbortController();
+        controllerRef.current = controller;
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(searchQuery, results.items.length, controller.signal);
+            const merged = { items: [...results.items, ...page.items], total: page.total };
+            // Later pages don't make the first one any fresher
+            cachePut(searchQuery, merged, queryCache.get(searchQuery)?.fetchedAt);
+            setResults(merged);
+        } catch (err) {
+            if (axios.isCancel(err)) return;
+            setError('Failed to load more results. Please try again.');
+            console.error(err);
+        } finally {
+            if (controllerRef.current === controller) setLoadingMore(false);
         }
+    }, [activeQuery, results, loading, loadingMore, error]);
+
+    // Search as you type, once typing pauses
+    useEffect(() => {
+        if (!typedRef.current) return undefined;
+        const timer = setTimeout(() => search(query.trim()), DEBOUNCE_MS);
+        return () => clearTimeout(timer);
+    }, [query, search]);
+
+    useEffect(() => () => controllerRef.current?.abort(), []);
+
+    const handleChange = (e) => {
+        typedRef.current = true;
+        setQuery(e.target.value);
     };
 
     const handleSearch = (e) => {
         e.preventDefault();
-        search(query);
+        search(query.trim(), { fresh: true });
     };
 
     const showAll = () => {
         setQuery('');
-        search('');
+        search('', { fresh: true });
     };
 
     return (
@@ -58,7 +169,7 @@ function App() {
                             <input
                                 type="text"
                                 value={query}
-                                onChange={(e) => setQuery(e.target.value)}
+                                onChange={handleChange}
                                 placeholder="Search by hostname, IP, MAC, or time..."
                                 className="w-full bg-black/30 border-2 border-primary/30 rounded-xl py-3 pl-12 pr-4 text-white placeholder-gray-500 focus:border-primary focus:shadow-[0_0_20px_rgba(0,212,255,0.2)] outline-none transition-all duration-300"
                             />
@@ -99,14 +210,30 @@ function App() {
                         <div className="w-12 h-12 border-4 border-primary/30 border-t-primary rounded-full animate-spin"></div>
                     </div>
                 ) : (
-                    <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-                        {results.map((device, index) => (
-                            <ResultItem key={index} device={device} index={index} />
-                        ))}
-                    </div>
+                    <>
+                        {results.items.length > 0 && (
+                            <p className="text-gray-400 mb-4">
+                                Showing <span className="text-primary font-semibold">{results.items.length}</span>
+                                {results.total > results.items.length && <> of <span className="text-primary font-semibold">{results.total}</span></>}
+                                {' '}device{results.total !== 1 ? 's' : ''}
+                            </p>
+                        )}
+                        <VirtualGrid
+                            items={results.items}
+                            rowHeight={CARD_HEIGHT}
+                            getKey={deviceKey}
+                            renderItem={(device) => <ResultItem device={device} />}
+                            onEndReached={loadMore}
+                        />
+                        {loadingMore && (
+                            <div className="flex justify-center py-8">
+                                <div className="w-8 h-8 border-4 border-primary/30 border-t-primary rounded-full animate-spin"></div>
+                            </div>
+                        )}
+                    </>
                 )}
 
-                {!loading && hasSearched && results.length === 0 && !error && (
+                {!loading && hasSearched && results.items.length === 0 && !error && (
                     <div className="text-center py-20 text-gray-500">
                         <p className="text-6xl mb-4">📡</p>
                         <p className="text-xl">No devices found</p>
@@ -117,15 +244,16 @@ function App() {
     );
 }
 
-function ResultItem({ device, index }) {
+// Cards are recycled as the grid scrolls, so they fade in without per-index delays
+function ResultItem({ device }) {
     const isWifi = (device.device_type || '').toLowerCase().includes('wi-fi');
 
     return (
         <motion.div
-            initial={{ opacity: 0, y: 20 }}
-            animate={{ opacity: 1, y: 0 }}
-            transition={{ delay: index * 0.05 }}
-            className="bg-white/5 backdrop-blur-md rounded-2xl p-6 border border-white/10 hover:border-primary/30 hover:shadow-[0_15px_40px_rgba(0,0,0,0.3)] hover:-translate-y-1 transition-all duration-300 group"
+            initial={{ opacity: 0 }}
+            animate={{ opacity: 1 }}
+            transition={{ duration: 0.15 }}
+            className="h-full bg-white/5 backdrop-blur-md rounded-2xl p-6 border border-white/10 hover:border-primary/30 hover:shadow-[0_15px_40px_rgba(0,0,0,0.3)] hover:-translate-y-1 transition-all duration-300 group"
         >
             <div className="flex justify-between items-start mb-4">
                 <h3 className="text-xl font-bold text-white truncate pr-2" title={device.hostname}>
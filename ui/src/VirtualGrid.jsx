@@ -0,0 +1,78 @@
+import React, { useEffect, useRef, useState } from 'react';
+
+// Matches the `gap-6` spacing and md/lg breakpoints of the results grid
+const GAP = 24;
+
+function columnsFor(width) {
+    if (width >= 1024) return 3;
+    if (width >= 768) return 2;
+    return 1;
+}
+
+/**
+ * Responsive card grid that only mounts the rows near the viewport.
+ * Rows have a fixed height so positions can be computed from the page scroll
+ * offset; `onEndReached` fires when the last rows come into view.
+ */
+function VirtualGrid({ items, rowHeight, getKey, renderItem, onEndReached, overscan = 3 }) {
+    const containerRef = useRef(null);
+    const [viewport, setViewport] = useState({
+        offset: 0,
+        height: window.innerHeight,
+        columns: columnsFor(window.innerWidth),
+    });
+
+    useEffect(() => {
+        let frame = null;
+        const measure = () => {
+            frame = null;
+            if (!containerRef.current) return;
+            const top = containerRef.current.getBoundingClientRect().top;
+            setViewport({
+                offset: Math.max(0, -top),
+                height: window.innerHeight,
+                columns: columnsFor(window.innerWidth),
+            });
+        };
+        const schedule = () => {
+            if (frame === null) frame = requestAnimationFrame(measure);
+        };
+        measure();
+        window.addEventListener('scroll', schedule, { passive: true });
+        window.addEventListener('resize', schedule);
+        return () => {
+            window.removeEventListener('scroll', schedule);
+            window.removeEventListener('resize', schedule);
+            if (frame !== null) cancelAnimationFrame(frame);
+        };
+    }, []);
+
+    const { columns } = viewport;
+    const stride = rowHeight + GAP;
+    const rowCount = Math.ceil(items.length / columns);
+    const firstRow = Math.max(0, Math.floor(viewport.offset / stride) - overscan);
+    const lastRow = Math.min(rowCount - 1, Math.ceil((viewport.offset + viewport.height) / stride) + overscan);
+
+    useEffect(() => {
+        if (onEndReached && rowCount > 0 && lastRow >= rowCount - 1) {
+            onEndReached();
+        }
+    }, [lastRow, rowCount, onEndReached]);
+
+    const visible = items.slice(firstRow * columns, (lastRow + 1) * columns);
+
+    return (
+        <div ref={containerRef} className="relative" style={{ height: rowCount > 0 ? rowCount * stride - GAP : 0 }}>
+            <div
+                className="absolute inset-x-0 grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6"
+                style={{ top: firstRow * stride, gridAutoRows: rowHeight }}
+            >
+                {visible.map((item) => (
+                    <React.Fragment key={getKey(item)}>{renderItem(item)}</React.Fragment>
+                ))}
+            </div>
+        </div>
+    );
+}
+
+export default VirtualGrid;
@@ -1,11 +1,19 @@
-from fastapi import FastAPI, Query
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 import os
 import re
-import ipaddress
-import fnmatch
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import metrics
+import profiling
+import search_query
+import snapshot
+import static_assets
+import storage
+from search_query import matches_text
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -17,36 +25,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
-DB_CONFIG = {
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'host': os.getenv('DB_HOST', 'db'),
-    'database': os.getenv('DB_NAME', 'device_tracker'),
-    'raise_on_warnings': True
-}
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    # Also captures other requests interleaved on the event loop (see profiling.py)
+    with profiling.profiled(f"request-{request.method}-{request.url.path}"):
+        response = await call_next(request)
+    # Label by route template so /devices/{identifier} stays one series
+    route = request.scope.get('route')
+    endpoint = route.path if route is not None else 'unmatched'
+    metrics.REQUEST_SECONDS.labels(request.method, endpoint, response.status_code).observe(
+        time.perf_counter() - start
+    )
+    return response
 
 
 def get_db_connection():
-    try:
-        import mysql.connector
-        return mysql.connector.connect(**DB_CONFIG)
-    except Exception as err:
-        print(f"Database connection error: {err}")
-        return None
+    return storage.get_db_connection()
 
 
-def query_devices(where_clause=None, params=None):
+def query_rows(query, params=None):
     conn = get_db_connection()
     if not conn:
         return []
 
     cursor = conn.cursor(dictionary=True)
-    query = "SELECT * FROM devices"
-    if where_clause:
-        query += f" WHERE {where_clause}"
-
     cursor.execute(query, params or ())
     results = cursor.fetchall()
 
@@ -61,6 +68,55 @@ def query_devices(where_clause=None, params=None):
     return results
 
 
+def query_devices(where_clause=None, params=None):
+    query = "SELECT * FROM devices"
+    if where_clause:
+        query += f" WHERE {where_clause}"
+    return query_rows(query + " ORDER BY id", params)
+
+
+def load_devices(field=None, value=None):
+    """
+    All devices, or those whose `field` equals `value`, served from the parser's
+    memory-mapped snapshot when one is published and from the database otherwise.
+    """
+    current = snapshot.load_snapshot()
+    if current is None:
+        if field is None:
+            return query_devices()
+        return query_devices(f"{field} = %s", (value,))
+
+    if field is None:
+        return current.devices()
+    return current.find(field, value)
+
+
+STAT_BUCKETS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+
+def get_stats(bucket: str = 'day', limit: int = 30) -> dict:
+    """
+    Read the rollup tables maintained by parser.update_database.
+    Returns per-type totals plus the last `limit` hourly or daily buckets.
+    """
+    by_type = query_rows("SELECT * FROM device_type_stats ORDER BY device_type")
+    since = datetime.now() - STAT_BUCKETS[bucket] * limit
+    trend = query_rows(
+        "SELECT bucket_start, device_type, new_devices, peak_online FROM device_activity_stats "
+        "WHERE bucket = %s AND bucket_start >= %s ORDER BY bucket_start, device_type",
+        (bucket, since),
+    )
+    return {
+        'totals': {
+            'total_devices': sum(row['total_devices'] for row in by_type),
+            'online_devices': sum(row['online_devices'] for row in by_type),
+        },
+        'by_type': by_type,
+        'bucket': bucket,
+        'trend': trend,
+    }
+
+
 def wildcard_to_sql_like(pattern: str) -> str:
     """Convert wildcard pattern (* and ?) to SQL LIKE pattern (% and _)"""
     # Escape SQL special characters first
@@ -70,624 +126,159 @@ def wildcard_to_sql_like(pattern: str) -> str:
     return pattern
 
 
-def is_cidr_notation(query: str) -> bool:
-    """Check if query is in CIDR notation (e.g., 192.168.1.0/24)"""
-    try:
-        ipaddress.ip_network(query, strict=False)
-        return '/' in query
-    except ValueError:
-        return False
-
-
-def ip_in_network(ip: str, network_str: str) -> bool:
-    """Check if an IP address is within a network"""
-    try:
-        network = ipaddress.ip_network(network_str, strict=False)
-        ip_obj = ipaddress.ip_address(ip)
-        return ip_obj in network
-    except ValueError:
-        return False
-
-
-def matches_wildcard(value: str, pattern: str) -> bool:
-    """Check if value matches a wildcard pattern using fnmatch"""
-    if not value:
-        return False
-    return fnmatch.fnmatch(value.lower(), pattern.lower())
-
-
 def search_devices(query: str) -> list:
     """
     Search devices by hostname, IP address, MAC address, or last_seen time.
-    Supports wildcards (* and ?) and CIDR notation for IP addresses.
+    Supports wildcards (* and ?) and CIDR notation for IP addresses, and
+    `field:value` filters (see search_query.py). Raises ValueError on a
+    malformed filter.
     """
-    all_devices = query_devices()
-    
     if not query or query.strip() == '':
-        return all_devices
+        return load_devices()
     
     query = query.strip()
-    matched_devices = []
-    
-    # Check if it's CIDR notation
-    if is_cidr_notation(query):
-        for device in all_devices:
-            if device.get('ip_address') and ip_in_network(device['ip_address'], query):
-                matched_devices.append(device)
-        return matched_devices
-    
-    # Check if query contains wildcards
-    has_wildcards = '*' in query or '?' in query
-    
-    for device in all_devices:
-        matched = False
-        
-        # Check hostname
-        hostname = device.get('hostname', '') or ''
-        if has_wildcards:
-            if matches_wildcard(hostname, query):
-                matched = True
-        else:
-            if query.lower() in hostname.lower():
-                matched = True
-        
-        # Check IP address
-        ip_address = device.get('ip_address', '') or ''
-        if not matched:
-            if has_wildcards:
-                if matches_wildcard(ip_address, query):
-                    matched = True
-            else:
-                if query in ip_address:
-                    matched = True
-        
-        # Check MAC address
-        mac_address = device.get('mac_address', '') or ''
-        if not matched:
-            # Normalize MAC address comparison (remove colons/dashes for comparison)
-            query_normalized = query.replace(':', '').replace('-', '').lower()
-            mac_normalized = mac_address.replace(':', '').replace('-', '').lower()
-            if has_wildcards:
-                # Also try matching with colons
-                if matches_wildcard(mac_address, query) or matches_wildcard(mac_normalized, query_normalized):
-                    matched = True
-            else:
-                if query_normalized in mac_normalized or query.lower() in mac_address.lower():
-                    matched = True
-        
-        # Check last_seen time
-        last_seen = device.get('last_seen', '') or ''
-        if not matched and last_seen:
-            last_seen_str = str(last_seen)
-            if has_wildcards:
-                if matches_wildcard(last_seen_str, query):
-                    matched = True
-            else:
-                if query in last_seen_str:
-                    matched = True
-        
-        # Check first_seen time
-        first_seen = device.get('first_seen', '') or ''
-        if not matched and first_seen:
-            first_seen_str = str(first_seen)
-            if has_wildcards:
-                if matches_wildcard(first_seen_str, query):
-                    matched = True
-            else:
-                if query in first_seen_str:
-                    matched = True
-        
-        # Check device type
-        device_type = device.get('device_type', '') or ''
-        if not matched:
-            if has_wildcards:
-                if matches_wildcard(device_type, query):
-                    matched = True
-            else:
-                if query.lower() in device_type.lower():
-                    matched = True
-        
-        if matched:
-            matched_devices.append(device)
-    
-    return matched_devices
+    predicates = search_query.parse(query)
+    if predicates is None:
+        # Plain free text: match the whole query against every field
+        return [device for device in load_devices() if matches_text(device, query)]
+
+    plan = search_query.Plan(predicates)
+    current = snapshot.load_snapshot()
+    if current is not None and plan.index is not None and plan.index.exact is not None:
+        candidates = current.find(*plan.index.exact)
+    elif current is not None and plan.index is None:
+        candidates = current.devices()
+    else:
+        # Prefix, CIDR and range lookups use the database indexes
+        candidates = query_devices(*plan.where())
+    return [device for device in candidates if plan.matches(device)]
+
+
+# Built once per process: fingerprinted, precompressed legacy UI files
+LEGACY_UI = static_assets.build_legacy_ui()
+
+
+def serve_asset(asset, request: Request) -> Response:
+    """Serve the best precompressed variant of `asset`, or 304 if the client's copy is current."""
+    encoding = asset.negotiate(request.headers.get('accept-encoding'))
+    headers = {
+        'ETag': asset.etag(encoding),
+        'Cache-Control': asset.cache_control,
+        'Vary': 'Accept-Encoding',
+    }
+    if static_assets.if_none_match(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(content=asset.variants[encoding], media_type=asset.content_type, headers=headers)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def serve_ui():
+async def serve_ui(request: Request):
     """Serve the main web UI"""
-    html_content = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Device Tracker - Search</title>
-    <style>
-        * {
-            box-sizing: border-box;
-            margin: 0;
-            padding: 0;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
-            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-            min-height: 100vh;
-            color: #e0e0e0;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        
-        header {
-            text-align: center;
-            margin-bottom: 30px;
-        }
-        
-        h1 {
-            font-size: 2.5rem;
-            color: #00d4ff;
-            margin-bottom: 10px;
-            text-shadow: 0 0 20px rgba(0, 212, 255, 0.3);
-        }
-        
-        .subtitle {
-            color: #888;
-            font-size: 0.95rem;
-        }
-        
-        .search-container {
-            background: rgba(255, 255, 255, 0.05);
-            border-radius: 16px;
-            padding: 25px;
-            margin-bottom: 30px;
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        .search-box {
-            display: flex;
-            gap: 12px;
-            flex-wrap: wrap;
-        }
-        
-        #searchInput {
-            flex: 1;
-            min-width: 250px;
-            padding: 15px 20px;
-            font-size: 1.1rem;
-            border: 2px solid rgba(0, 212, 255, 0.3);
-            border-radius: 12px;
-            background: rgba(0, 0, 0, 0.3);
-            color: #fff;
-            outline: none;
-            transition: all 0.3s ease;
-        }
-        
-        #searchInput:focus {
-            border-color: #00d4ff;
-            box-shadow: 0 0 20px rgba(0, 212, 255, 0.2);
-        }
-        
-        #searchInput::placeholder {
-            color: #666;
-        }
-        
-        .btn {
-            padding: 15px 30px;
-            font-size: 1rem;
-            font-weight: 600;
-            border: none;
-            border-radius: 12px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .btn-primary {
-            background: linear-gradient(135deg, #00d4ff 0%, #0099cc 100%);
-            color: #000;
-        }
-        
-        .btn-primary:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 30px rgba(0, 212, 255, 0.3);
-        }
-        
-        .btn-secondary {
-            background: rgba(255, 255, 255, 0.1);
-            color: #e0e0e0;
-            border: 1px solid rgba(255, 255, 255, 0.2);
-        }
-        
-        .btn-secondary:hover {
-            background: rgba(255, 255, 255, 0.15);
-        }
-        
-        .help-text {
-            margin-top: 15px;
-            font-size: 0.85rem;
-            color: #888;
-            line-height: 1.6;
-        }
-        
-        .help-text code {
-            background: rgba(0, 212, 255, 0.1);
-            padding: 2px 8px;
-            border-radius: 4px;
-            color: #00d4ff;
-            font-family: 'Monaco', 'Consolas', monospace;
-        }
-        
-        .results-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-        }
-        
-        .results-count {
-            font-size: 1.1rem;
-            color: #888;
-        }
-        
-        .results-count span {
-            color: #00d4ff;
-            font-weight: 600;
-        }
-        
-        .results-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
-            gap: 20px;
-        }
-        
-        .device-card {
-            background: rgba(255, 255, 255, 0.05);
-            border-radius: 16px;
-            padding: 20px;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            transition: all 0.3s ease;
-        }
-        
-        .device-card:hover {
-            transform: translateY(-5px);
-            border-color: rgba(0, 212, 255, 0.3);
-            box-shadow: 0 15px 40px rgba(0, 0, 0, 0.3);
-        }
-        
-        .device-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: flex-start;
-            margin-bottom: 15px;
-        }
-        
-        .device-name {
-            font-size: 1.2rem;
-            font-weight: 600;
-            color: #fff;
-            word-break: break-all;
-        }
-        
-        .device-type {
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 0.75rem;
-            font-weight: 600;
-            text-transform: uppercase;
-        }
-        
-        .device-type.wifi {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #fff;
-        }
-        
-        .device-type.ethernet {
-            background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);
-            color: #000;
-        }
-        
-        .device-info {
-            display: flex;
-            flex-direction: column;
-            gap: 10px;
-        }
-        
-        .info-row {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 8px 0;
-            border-bottom: 1px solid rgba(255, 255, 255, 0.05);
-        }
-        
-        .info-row:last-child {
-            border-bottom: none;
-        }
-        
-        .info-label {
-            color: #888;
-            font-size: 0.85rem;
-        }
-        
-        .info-value {
-            color: #e0e0e0;
-            font-family: 'Monaco', 'Consolas', monospace;
-            font-size: 0.9rem;
-            text-align: right;
-            word-break: break-all;
-        }
-        
-        .info-value.ip {
-            color: #00d4ff;
-        }
-        
-        .info-value.mac {
-            color: #ffd700;
-        }
-        
-        .no-results {
-            text-align: center;
-            padding: 60px 20px;
-            color: #666;
-        }
-        
-        .no-results-icon {
-            font-size: 4rem;
-            margin-bottom: 20px;
-        }
-        
-        .loading {
-            text-align: center;
-            padding: 60px 20px;
-        }
-        
-        .spinner {
-            width: 50px;
-            height: 50px;
-            border: 3px solid rgba(0, 212, 255, 0.1);
-            border-top-color: #00d4ff;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 20px;
-        }
-        
-        @keyframes spin {
-            to { transform: rotate(360deg); }
-        }
-        
-        .error-message {
-            background: rgba(255, 71, 87, 0.1);
-            border: 1px solid rgba(255, 71, 87, 0.3);
-            border-radius: 12px;
-            padding: 20px;
-            color: #ff4757;
-            text-align: center;
-        }
-        
-        @media (max-width: 600px) {
-            h1 {
-                font-size: 1.8rem;
-            }
-            
-            .search-box {
-                flex-direction: column;
-            }
-            
-            .btn {
-                width: 100%;
-            }
-            
-            .results-grid {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>🔍 Device Tracker</h1>
-            <p class="subtitle">Search your network devices by hostname, IP, MAC address, or time</p>
-        </header>
-        
-        <div class="search-container">
-            <div class="search-box">
-                <input type="text" id="searchInput" placeholder="Enter hostname, IP, MAC, or date/time..." autofocus>
-                <button class="btn btn-primary" onclick="performSearch()">Search</button>
-                <button class="btn btn-secondary" onclick="showAll()">Show All</button>
-            </div>
-            <p class="help-text">
-                <strong>Search tips:</strong> 
-                Use <code>*</code> for wildcards (e.g., <code>192.168.*</code> or <code>*phone*</code>), 
-                <code>?</code> for single character, 
-                CIDR notation for subnets (e.g., <code>192.168.1.0/24</code>), 
-                or partial matches for hostnames, IPs, and MAC addresses.
-            </p>
-        </div>
-        
-        <div id="resultsContainer">
-            <div class="no-results">
-                <div class="no-results-icon">📡</div>
-                <p>Enter a search term or click "Show All" to view all devices</p>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        const searchInput = document.getElementById('searchInput');
-        const resultsContainer = document.getElementById('resultsContainer');
-        
-        // Search on Enter key
-        searchInput.addEventListener('keypress', (e) => {
-            if (e.key === 'Enter') {
-                performSearch();
-            }
-        });
-        
-        async function performSearch() {
-            const query = searchInput.value.trim();
-            if (!query) {
-                showAll();
-                return;
-            }
-            
-            showLoading();
-            
-            try {
-                const response = await fetch(`/search?q=${encodeURIComponent(query)}`);
-                if (!response.ok) throw new Error('Search failed');
-                const devices = await response.json();
-                displayResults(devices, query);
-            } catch (error) {
-                showError(error.message);
-            }
-        }
-        
-        async function showAll() {
-            showLoading();
-            
-            try {
-                const response = await fetch('/devices');
-                if (!response.ok) throw new Error('Failed to fetch devices');
-                const devices = await response.json();
-                displayResults(devices, null);
-            } catch (error) {
-                showError(error.message);
-            }
-        }
-        
-        function showLoading() {
-            resultsContainer.innerHTML = `
-                <div class="loading">
-                    <div class="spinner"></div>
-                    <p>Searching devices...</p>
-                </div>
-            `;
-        }
-        
-        function showError(message) {
-            resultsContainer.innerHTML = `
-                <div class="error-message">
-                    <p>⚠️ ${message}</p>
-                    <p>Please try again or check your connection.</p>
-                </div>
-            `;
-        }
-        
-        function displayResults(devices, searchQuery) {
-            if (!devices || devices.length === 0) {
-                resultsContainer.innerHTML = `
-                    <div class="no-results">
-                        <div class="no-results-icon">🔍</div>
-                        <p>No devices found${searchQuery ? ' matching "' + escapeHtml(searchQuery) + '"' : ''}</p>
-                    </div>
-                `;
-                return;
-            }
-            
-            const headerText = searchQuery 
-                ? `Found <span>${devices.length}</span> device${devices.length !== 1 ? 's' : ''} matching "${escapeHtml(searchQuery)}"`
-                : `Showing <span>${devices.length}</span> device${devices.length !== 1 ? 's' : ''}`;
-            
-            let html = `
-                <div class="results-header">
-                    <p class="results-count">${headerText}</p>
-                </div>
-                <div class="results-grid">
-            `;
-            
-            for (const device of devices) {
-                const deviceType = (device.device_type || 'unknown').toLowerCase();
-                const typeClass = deviceType.includes('wi-fi') || deviceType.includes('wifi') ? 'wifi' : 'ethernet';
-                
-                html += `
-                    <div class="device-card">
-                        <div class="device-header">
-                            <span class="device-name">${escapeHtml(device.hostname || 'Unknown')}</span>
-                            <span class="device-type ${typeClass}">${escapeHtml(device.device_type || 'Unknown')}</span>
-                        </div>
-                        <div class="device-info">
-                            <div class="info-row">
-                                <span class="info-label">IP Address</span>
-                                <span class="info-value ip">${escapeHtml(device.ip_address || 'N/A')}</span>
-                            </div>
-                            <div class="info-row">
-                                <span class="info-label">MAC Address</span>
-                                <span class="info-value mac">${escapeHtml(device.mac_address || 'N/A')}</span>
-                            </div>
-                            <div class="info-row">
-                                <span class="info-label">First Seen</span>
-                                <span class="info-value">${formatDateTime(device.first_seen)}</span>
-                            </div>
-                            <div class="info-row">
-                                <span class="info-label">Last Seen</span>
-                                <span class="info-value">${formatDateTime(device.last_seen)}</span>
-                            </div>
-                        </div>
-                    </div>
-                `;
-            }
-            
-            html += '</div>';
-            resultsContainer.innerHTML = html;
-        }
-        
-        function escapeHtml(text) {
-            if (!text) return '';
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }
-        
-        function formatDateTime(dateStr) {
-            if (!dateStr) return 'N/A';
-            try {
-                const date = new Date(dateStr);
-                return date.toLocaleString();
-            } catch {
-                return dateStr;
-            }
-        }
-    </script>
-</body>
-</html>"""
-    return HTMLResponse(content=html_content)
+    return serve_asset(LEGACY_UI['/'], request)
+
+
+@app.get("/static/{name}")
+async def serve_static(name: str, request: Request):
+    """Fingerprinted legacy UI stylesheet and script, cacheable forever"""
+    asset = LEGACY_UI.get(static_assets.STATIC_PREFIX + name)
+    if asset is None:
+        return Response(status_code=404)
+    return serve_asset(asset, request)
+
+
+def page_response(page: list, total: int, endpoint: str) -> JSONResponse:
+    """Return one page of results with the full match count in the X-Total-Count header."""
+    metrics.RESULT_ROWS.labels(endpoint).observe(len(page))
+    return JSONResponse(content=page, headers={'X-Total-Count': str(total)})
+
+
+def paginated_response(devices: list, endpoint: str, limit, offset: int) -> JSONResponse:
+    """
+    Return one page of `devices` when `limit` is given (all of them otherwise).
+    Pages are cut in id order so consecutive pages never overlap.
+    """
+    devices = sorted(devices, key=lambda device: device['id'])
+    page = devices[offset:offset + limit] if limit is not None else devices[offset:]
+    return page_response(page, len(devices), endpoint)
+
+
+def load_device_page(limit, offset: int):
+    """
+    (page, total) of all devices in id order. Only the requested page is read
+    from the database or decoded from the snapshot.
+    """
+    current = snapshot.load_snapshot()
+    if current is not None:
+        return current.devices(offset, offset + limit if limit is not None else None), current.count
+    if limit is None:
+        devices = query_devices()
+        return devices[offset:], len(devices)
+    counted = query_rows("SELECT COUNT(*) AS total FROM devices")
+    page = query_rows("SELECT * FROM devices ORDER BY id LIMIT %s OFFSET %s", (limit, offset))
+    return page, counted[0]['total'] if counted else 0
 
 
 @app.get("/search")
-async def search(q: str = Query(default="", description="Search query")):
+async def search(
+    q: str = Query(default="", description="Search query"),
+    limit: Optional[int] = Query(default=None, ge=1, description="Page size (default: all results)"),
+    offset: int = Query(default=0, ge=0, description="Results to skip"),
+):
     """
     Search devices by hostname, IP address, MAC address, or last_seen time.
-    Supports wildcards (* and ?) and CIDR notation (e.g., 192.168.1.0/24).
+    Supports wildcards (* and ?) and CIDR notation (e.g., 192.168.1.0/24), and
+    filters such as `type:Wi-Fi host:pi* ip:192.168.1.0/24 seen>2026-10-01`.
     """
-    devices = search_devices(q)
-    return JSONResponse(content=devices)
+    try:
+        devices = search_devices(q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return paginated_response(devices, '/search', limit, offset)
 
 
 @app.get("/devices")
-async def get_all_devices():
-    devices = query_devices()
-    return JSONResponse(content=devices)
+async def get_all_devices(
+    limit: Optional[int] = Query(default=None, ge=1, description="Page size (default: all devices)"),
+    offset: int = Query(default=0, ge=0, description="Devices to skip"),
+):
+    page, total = load_device_page(limit, offset)
+    return page_response(page, total, '/devices')
 
 
 @app.get("/devices/{identifier}")
 async def get_device_by_identifier(identifier: str):
     if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', identifier):
-        devices = query_devices("ip_address = %s", (identifier,))
-        return JSONResponse(content=devices)
+        devices = load_devices('ip_address', identifier)
+    elif identifier in ['Ethernet', 'Wi-Fi']:
+        devices = load_devices('device_type', identifier)
+    else:
+        devices = load_devices('hostname', identifier)
 
-    if identifier in ['Ethernet', 'Wi-Fi']:
-        devices = query_devices("device_type = %s", (identifier,))
-        return JSONResponse(content=devices)
-
-    devices = query_devices("hostname = %s", (identifier,))
+    metrics.RESULT_ROWS.labels('/devices/{identifier}').observe(len(devices))
     return JSONResponse(content=devices)
 
 
+@app.get("/stats")
+async def get_device_stats(
+    bucket: str = Query(default="day", pattern="^(hour|day)$", description="Trend bucket size"),
+    limit: int = Query(default=30, ge=1, le=1000, description="Number of buckets to return"),
+):
+    """
+    Precomputed device counts: totals and currently-online devices per type,
+    plus new devices and peak online devices per hourly or daily bucket.
+    """
+    return JSONResponse(content=get_stats(bucket, limit))
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == '__main__':
     import uvicorn
     port = int(os.getenv('WEB_PORT', '5000'))